@@ -10,12 +10,16 @@ from jsonsubschema import _canonicalization
 from jsonsubschema import _explain
 
 isSubschema = api.isSubschema
+isSubschemaCanonical = api.isSubschemaCanonical
+isSubschemaBoth = api.isSubschemaBoth
 meetSchemas = api.meet
 joinSchemas = api.join
 isEquivalent = api.isEquivalent
 schemaDiff = api.schemaDiff
+clear_cache = api.clear_cache
 
 canonicalizeSchema = _canonicalization.canonicalize_schema
+canonicalize = api.canonicalize
 
 set_debug = config.set_debug
 set_warn_uninhabited = config.set_warn_uninhabited
@@ -0,0 +1,157 @@
+'''
+Memoization of the pairwise schema entry points.
+'''
+
+import functools
+import json
+import weakref
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+import jsonsubschema.config as config
+from jsonsubschema._explain import ExplainContext
+
+# Only plain JSON documents are cached. Simplified checker objects (e.g.
+# the results of meet/join) are dicts too, but their checker state is not
+# always reflected in their dict content.
+_FREEZABLE_TYPES = (dict, bool)
+
+
+def freeze(schema):
+    ''' Return a hashable canonical form of a JSON schema.
+
+        The canonical JSON text is used rather than nested tuples because
+        tuples don't tell 1, 1.0 and True apart, while JSON schema does.
+        Raises TypeError or ValueError for schemas that can't be frozen. '''
+
+    if type(schema) not in _FREEZABLE_TYPES:
+        raise TypeError("Can't freeze schema of type " + type(schema).__name__)
+    return json.dumps(schema, sort_keys=True)
+
+
+_SCALAR_TYPES = frozenset([str, int, float, bool, type(None)])
+
+
+def freeze_flat(schema):
+    ''' Cheaper hashable form of schemas whose values are all scalars,
+        such as {"type": "string"}, or None for any other schema.
+        Value types are part of the key, as 1 == 1.0 == True. '''
+
+    if type(schema) is not dict:
+        return None
+    items = []
+    for k, v in schema.items():
+        if type(v) not in _SCALAR_TYPES:
+            return None
+        items.append((k, type(v), v))
+    return frozenset(items)
+
+
+def thaw(frozen):
+    ''' Rebuild a fresh schema from its frozen form. '''
+
+    return json.loads(frozen)
+
+
+# Simplified schemas shared by structurally identical inputs, keyed on the
+# validator and the frozen input.
+_interned = weakref.WeakValueDictionary()
+
+
+def interned(schema, build):
+    ''' Return build(schema), reusing the object built for a structurally
+        identical schema while that object is still alive.
+
+        The shared objects must be treated as read-only: this is only safe
+        for subtype checks, meet and join modify their operands. '''
+
+    if not caching_enabled():
+        return build(schema)
+    try:
+        key = (config.VALIDATOR, freeze(schema))
+    except (TypeError, ValueError):
+        return build(schema)
+    ret = _interned.get(key)
+    if ret is None:
+        ret = build(schema)
+        _interned[key] = ret
+    return ret
+
+
+# Simplified leaf schemas (string, numeric, boolean and null checkers),
+# keyed on the validator and the frozen canonical schema. Shared only while
+# leaf_interning() is active, i.e. while building subtype operands.
+_interned_leaves = weakref.WeakValueDictionary()
+_leaf_interning = ContextVar("leaf_interning", default=False)
+
+
+@contextmanager
+def leaf_interning():
+    ''' Share simplified leaf schemas between structurally identical
+        subschemas built inside the block, so that repeated literals
+        like {"type": "string"} compare by identity. '''
+
+    token = _leaf_interning.set(True)
+    try:
+        yield
+    finally:
+        _leaf_interning.reset(token)
+
+
+def interned_leaf(schema, build):
+    ''' Like interned(), for the leaf subschemas of an operand. Outside of
+        leaf_interning() every call builds a fresh object. '''
+
+    if not _leaf_interning.get() or not caching_enabled():
+        return build(schema)
+    key = freeze_flat(schema)
+    if key is None:
+        try:
+            key = freeze(schema)
+        except (TypeError, ValueError):
+            return build(schema)
+    key = (config.VALIDATOR, key)
+    ret = _interned_leaves.get(key)
+    if ret is None:
+        ret = build(schema)
+        _interned_leaves[key] = ret
+    return ret
+
+
+def caching_enabled():
+    ''' Checks with side effects beyond their result, i.e. that collect
+        explanations, print debugging info or warn about uninhabited
+        types, are never served from a cache. '''
+
+    return not (config.PRINT_DB or config.WARN_UNINHABITED or ExplainContext.is_active())
+
+
+def memoize_schema_pair(maxsize=4096):
+    ''' LRU cache for functions of two JSON schemas.
+
+        Results are keyed on the frozen form of both schemas and the
+        configured validator. Arguments that can't be frozen, and calls
+        made while caching is disabled, go straight to the function. '''
+
+    def decorator(func):
+
+        @functools.lru_cache(maxsize=maxsize)
+        def cached(frozen_s1, frozen_s2, validator):
+            return func(thaw(frozen_s1), thaw(frozen_s2))
+
+        @functools.wraps(func)
+        def wrapper(s1, s2):
+            if not caching_enabled():
+                return func(s1, s2)
+            try:
+                frozen_s1 = freeze(s1)
+                frozen_s2 = freeze(s2)
+            except (TypeError, ValueError):
+                return func(s1, s2)
+            return cached(frozen_s1, frozen_s2, config.VALIDATOR)
+
+        wrapper.cache_clear = cached.cache_clear
+        wrapper.cache_info = cached.cache_info
+        return wrapper
+
+    return decorator
@@ -3,16 +3,21 @@ Created on June 24, 2019
 @author: Andrew Habib
 '''
 
+import collections
 import copy
+import functools
 import jsonschema
 import numbers
 import math
 import re
 import sys
 
+import jsonsubschema.config as config
 import jsonsubschema._constants as definitions
 import jsonsubschema._utils as utils
+from jsonsubschema._cache import caching_enabled, freeze, freeze_flat, interned_leaf, thaw
 from jsonsubschema._checkers import (
+    _content_keyed_types,
     typeToConstructor,
     boolToConstructor,
     JSONtop,
@@ -40,6 +45,26 @@ def canonicalize_schema(obj):
     return canonical_schema
 
 
+_immutable_json_types = frozenset([str, int, float, bool, type(None)])
+
+
+def copy_schema(s):
+    ''' copy.deepcopy() for json documents.
+        Every dict is copied at each level of canonicalization, so plain
+        dicts and lists are copied directly, which is several times
+        cheaper; anything else (e.g. checkers or jsonref proxies) is handed
+        to copy.deepcopy(). Unlike deepcopy, objects shared inside s are
+        copied separately. '''
+    t = type(s)
+    if t is dict:
+        return {k: copy_schema(v) for k, v in s.items()}
+    if t is list:
+        return [copy_schema(i) for i in s]
+    if t in _immutable_json_types:
+        return s
+    return copy.deepcopy(s)
+
+
 def canonicalize_dict(d, outer_key=None):
     # not actually needed, but for testing
     # canonicalization to work properly;
@@ -61,8 +86,18 @@ def canonicalize_dict(d, outer_key=None):
     #   dependencies
     # because these should be usual dict containers.
     if outer_key in ["properties", "patternProperties"]:
+        # Wide objects tend to repeat the same flat schema, e.g.
+        # {"type": "string"}, for many keys. Canonicalize each distinct
+        # one once and give the other keys copies of the result.
+        shared = {}
         for k, v in d.items():
-            d[k] = canonicalize_dict(v)
+            key = freeze_flat(v)
+            if key is None:
+                d[k] = canonicalize_dict(v)
+            elif key in shared:
+                d[k] = copy_schema(shared[key])
+            else:
+                d[k] = shared[key] = canonicalize_dict(v)
         return d
     if outer_key == "dependencies":
         for k, v in d.items():
@@ -75,10 +110,14 @@ def canonicalize_dict(d, outer_key=None):
         return d
 
     t = d.get("type")
+    # Bare types like {"type": "string"}, by far the most common leaves,
+    # are canonical already.
+    if len(d) == 1 and utils.is_str(t) and t in definitions.Jtypes:
+        return {"type": t}
     has_connectors = definitions.Jconnectors.intersection(d.keys())
 
     # Start canonicalization. Don't modify original dict.
-    d = copy.deepcopy(d)
+    d = copy_schema(d)
 
     # Rewrite if/then/else into anyOf+allOf before processing connectors.
     if "if" in d:
@@ -144,7 +183,7 @@ def canonicalize_list_of_types(d):
     anyofs = []
     for t_i in t:
         if t_i in definitions.Jtypes:
-            s_i = copy.deepcopy(d)
+            s_i = copy_schema(d)
             s_i["type"] = t_i
             s_i = canonicalize_single_type(s_i)
             anyofs.append(s_i)
@@ -225,6 +264,9 @@ def canonicalize_connectors(d):
         elif c == "oneOf":
             if len(d[c]) == 1:
                 return canonicalize_dict(d[c].pop())
+            ranges = _numeric_range_bounds(d[c])
+            if ranges:
+                return _canonicalize_oneOf_ranges(*ranges)
             anyofs = []
             for i in range(len(d[c])):
                 one = [d[c][i]]
@@ -234,13 +276,25 @@ def canonicalize_connectors(d):
                 anyofs.append({"allOf": allofs})
             return canonicalize_connectors({"anyOf": anyofs})
 
-        # Here, the connector is either allOf or oneOf
+        # Here, the connector is either allOf or anyOf
         # So we better simplify them before proceeding more.
         else:
-            d[c] = [canonicalize_dict(i) for i in d[c]]
-            # return d
-            simplified = simplify_schema_and_embed_checkers(d)
-            return simplified
+            d[c] = _splice_nested_connector(d[c], c)
+            if len(d[c]) == 1:
+                return canonicalize_dict(d[c].pop())
+            # Merging the branches is expensive and the same connectors
+            # tend to show up again and again, so reuse earlier results.
+            # The cached schema is copied on every use because meet/join
+            # may modify their operands.
+            if caching_enabled():
+                try:
+                    frozen = freeze(d)
+                except (TypeError, ValueError):
+                    pass
+                else:
+                    return copy.deepcopy(
+                        _simplify_frozen_connector(frozen, c, config.VALIDATOR))
+            return _simplify_connector(d, c)
 
     # Connector + other keywords. Combine them first.
     else:
@@ -255,6 +309,114 @@ def canonicalize_connectors(d):
         # return simplify_schema_and_embed_checkers({"allOf": allofs})
 
 
+_numeric_range_keys = frozenset(["type", "minimum", "maximum"])
+
+
+def _numeric_range_bounds(branches):
+    ''' Return (type, [(minimum, maximum), ...]) if all oneOf branches
+        are plain ranges of the same numeric type, None otherwise. '''
+    t = None
+    bounds = []
+    for b in branches:
+        if not utils.is_dict(b) or not b.keys() <= _numeric_range_keys:
+            return None
+        if b.get("type") not in ("integer", "number") or t not in (None, b["type"]):
+            return None
+        t = b["type"]
+        lo = b.get("minimum", -math.inf)
+        hi = b.get("maximum", math.inf)
+        if not (utils.is_num(lo) and utils.is_num(hi)):
+            return None
+        bounds.append((lo, hi))
+    return t, bounds
+
+
+def _canonicalize_oneOf_ranges(t, bounds):
+    ''' oneOf over numeric ranges holds exactly where one range does.
+        Instead of meeting every branch with the negation of all the
+        others, find those values in a single sweep over the sorted
+        range endpoints. '''
+    bounds = [(lo, hi) for lo, hi in bounds if lo <= hi]
+    starts = collections.Counter(lo for lo, _ in bounds)
+    ends = collections.Counter(hi for _, hi in bounds)
+    points = sorted(p for p in set(starts).union(ends)
+                    if not math.isinf(p))
+
+    # The number line splits into the open gaps between endpoints and the
+    # endpoints themselves; record (lo, lo_excl, hi, hi_excl, count) for
+    # each piece, where count is the number of ranges covering it.
+    pieces = []
+    active = starts[-math.inf]
+    prev = -math.inf
+    for p in points:
+        pieces.append((prev, True, p, True, active))
+        active += starts[p]
+        pieces.append((p, False, p, False, active))
+        active -= ends[p]
+        prev = p
+    pieces.append((prev, True, math.inf, True, active))
+
+    # Merge neighbouring pieces covered exactly once.
+    anyofs = []
+    run = None
+    for lo, lo_excl, hi, hi_excl, count in pieces:
+        if count == 1:
+            if run is None:
+                run = [lo, lo_excl, hi, hi_excl]
+            else:
+                run[2:] = [hi, hi_excl]
+        elif run is not None:
+            anyofs.append(run)
+            run = None
+    if run is not None:
+        anyofs.append(run)
+
+    ret = []
+    for lo, lo_excl, hi, hi_excl in anyofs:
+        r = {"type": t}
+        if not math.isinf(lo):
+            r["minimum"] = lo
+            if lo_excl:
+                r["exclusiveMinimum"] = True
+        if not math.isinf(hi):
+            r["maximum"] = hi
+            if hi_excl:
+                r["exclusiveMaximum"] = True
+        ret.append(r)
+
+    if not ret:
+        return BOT
+    if len(ret) == 1:
+        return canonicalize_dict(ret[0])
+    return canonicalize_dict({"anyOf": ret})
+
+
+def _splice_nested_connector(branches, c):
+    ''' allOf and anyOf are associative, so branches that are nothing
+        but the same connector are replaced by their own branches. '''
+    flat = []
+    todo = list(reversed(branches))
+    while todo:
+        b = todo.pop()
+        if utils.is_dict(b) and b.keys() == {c}:
+            todo.extend(reversed(b[c]))
+        else:
+            flat.append(b)
+    return flat
+
+
+def _simplify_connector(d, c):
+    d[c] = [canonicalize_dict(i) for i in d[c]]
+    # return d
+    simplified = simplify_schema_and_embed_checkers(d)
+    return simplified
+
+
+@functools.lru_cache(maxsize=1024)
+def _simplify_frozen_connector(frozen, c, validator):
+    return _simplify_connector(thaw(frozen), c)
+
+
 def canonicalize_not(d):
     # d: {} has a 'not' schema
     negated_schema = d["not"]
@@ -288,7 +450,9 @@ def canonicalize_not(d):
             # for i in negated_schema["allOf"]:
             #     anyofs.append(canonicalize_not({"not": i}))
             # return {"anyOf": anyofs}
-            return canonicalize_not({'not': canonicalize_connectors(negated_schema)})
+            # Simplify directly: canonicalize_connectors() would peel a
+            # single-branch allOf back into the schema we came from.
+            return canonicalize_not({'not': _simplify_connector(negated_schema, "allOf")})
 
                 #     anyofs.append(canonicalize_not({"not": i}))
         # Should not reach here. Should be canonicalized by now.
@@ -434,6 +598,8 @@ def simplify_schema_and_embed_checkers(s):
 
     #
     if "type" in s:
+        if s["type"] in _content_keyed_types:
+            return interned_leaf(s, typeToConstructor.get(s["type"]))
         return typeToConstructor.get(s["type"])(s)
 
     if "not" in s:
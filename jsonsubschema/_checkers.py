@@ -3,10 +3,17 @@ Created on June 24, 2019
 @author: Andrew Habib
 '''
 
+import collections
+import concurrent.futures
+import contextlib
+import contextvars
 import copy
 import json
 import math
+import os
 import sys
+from contextvars import ContextVar
+from fractions import Fraction
 
 import portion as I
 from greenery import parse
@@ -15,6 +22,7 @@ import jsonsubschema.config as config
 
 import jsonsubschema._constants as definitions
 import jsonsubschema._utils as utils
+from jsonsubschema._explain import ExplainContext
 from jsonsubschema._utils import print_db
 from jsonsubschema.exceptions import (
     UnsupportedNegatedArray,
@@ -22,6 +30,101 @@ from jsonsubschema.exceptions import (
 )
 
 
+# Results of the subtype checks made while checking one pair of schemas,
+# keyed on the ids of both operands. Each entry also holds the operands
+# themselves so that their ids can't be reused while the memo is alive.
+# Pairs of simple-type schemas are also keyed on their content, see
+# JSONschema.content_key().
+_subtype_memo = ContextVar("subtype_memo", default=None)
+
+# Types whose checker state is entirely derived from the schema document,
+# so that equal documents make checkers that behave the same. Array and
+# object meets set checker attributes directly instead.
+_content_keyed_types = frozenset(["string", "integer", "number", "boolean", "null"])
+
+
+@contextlib.contextmanager
+def subtype_memo():
+    ''' Remember the result of every (lhs, rhs) pair checked within the
+        block, so that shared sub-schemas are only compared once.
+        Schemas must not be modified while the block is active. '''
+    token = _subtype_memo.set({})
+    try:
+        yield
+    finally:
+        _subtype_memo.reset(token)
+
+
+# Worker threads for config.PARALLEL_BRANCHES, created on first use.
+_branch_pool = None
+# Set inside the workers, whose nested anyOf checks run sequentially so
+# that they never wait on the pool they are running in.
+_in_branch_pool = ContextVar("in_branch_pool", default=False)
+
+
+def _parallel_branches(branches):
+    ''' Should the subtype checks of branches run on the thread pool?
+        Checks that report what they do, through print_db() or
+        explanations, stay sequential to keep their output in order. '''
+    n = config.PARALLEL_BRANCHES
+    return bool(n) and len(branches) >= n and not _in_branch_pool.get() \
+        and not config.PRINT_DB and not ExplainContext.is_active()
+
+
+def _run_in_branch_pool(pred, branch):
+    _in_branch_pool.set(True)
+    return pred(branch)
+
+
+def _any_branch_in_pool(pred, branches):
+    ''' any(pred(b) for b in branches), evaluated on the thread pool.
+        Each check runs in a copy of the caller's context, so it shares
+        the caller's subtype memo. '''
+    global _branch_pool
+    if _branch_pool is None:
+        _branch_pool = concurrent.futures.ThreadPoolExecutor(
+            max_workers=os.cpu_count(), thread_name_prefix="jsonsubschema")
+    futures = [_branch_pool.submit(contextvars.copy_context().run,
+                                   _run_in_branch_pool, pred, b)
+               for b in branches]
+    try:
+        for f in concurrent.futures.as_completed(futures):
+            if f.result():
+                return True
+        return False
+    finally:
+        for f in futures:
+            f.cancel()
+
+
+# For each lhs type, the rhs types it can possibly be a subtype of.
+# Any other rhs type is rejected without looking at either schema.
+_subtype_candidate_types = {
+    "string": frozenset(["string", "anyOf"]),
+    "integer": frozenset(["integer", "number", "anyOf"]),
+    "number": frozenset(["number", "integer", "anyOf"]),
+    "boolean": frozenset(["boolean", "anyOf"]),
+    "null": frozenset(["null", "anyOf"]),
+    "array": frozenset(["array", "anyOf"]),
+    "object": frozenset(["object", "anyOf"]),
+}
+
+# One bit per json type, for JSONanyOf.typemask.
+_type_bits = {
+    "null": 1,
+    "boolean": 2,
+    "integer": 4,
+    "number": 8,
+    "string": 16,
+    "array": 32,
+    "object": 64,
+}
+
+# For each lhs type, the bits of the unconstrained rhs types that accept
+# all of its instances.
+_covering_type_bits = dict(_type_bits, integer=_type_bits["integer"] | _type_bits["number"])
+
+
 class UninhabitedMeta(type):
 
     def __call__(cls, *args, **kwargs):
@@ -49,15 +152,35 @@ class JSONschema(dict, metaclass=UninhabitedMeta):
         if "enum" in self:
             self.enum = self["enum"]
 
+    def __deepcopy__(self, memo):
+        # The default dict deepcopy goes through self.items(), which
+        # array schemas shadow with their 'items' keyword. Copy the dict
+        # content and the internal state without re-running the checks
+        # done at construction.
+        ret = dict.__new__(type(self))
+        memo[id(self)] = ret
+        for k, v in dict.items(self):
+            dict.__setitem__(ret, k, copy.deepcopy(v, memo))
+        ret.__dict__.update(copy.deepcopy(self.__dict__, memo))
+        return ret
+
     def updateInternalState(self):
         pass
 
+    def _isUninhabited(self):
+        return False
+
     def isBoolean(self):
         return self.keys() & definitions.Jconnectors
 
     def hasEnum(self):
         return "enum" in self.keys() or hasattr(self, "enum")
 
+    def isUnconstrained(self):
+        ''' Does self accept every instance of its type?
+            Only answered for the simple types; False means 'not known'. '''
+        return False
+
     def isUninhabited(self):
         # Don't store uninhabited key,
         # but rather re-check on the fly to
@@ -151,15 +274,60 @@ class JSONschema(dict, metaclass=UninhabitedMeta):
                 return s1.enum + s2.enum
 
     def isSubtype(self, s):
+        #
+        if self is s:
+            return True
+        #
+        memo = _subtype_memo.get()
+        if memo is None:
+            return self.isSubtype_uncached(s)
+        key = (id(self), id(s))
+        hit = memo.get(key)
+        if hit is not None:
+            return hit[2]
+        content_key = None
+        if self.type in _content_keyed_types and s.type in _content_keyed_types:
+            content_key = (self.content_key(), s.content_key())
+            hit = memo.get(content_key)
+            if hit is not None:
+                memo[key] = (self, s, hit[2])
+                return hit[2]
+        ret = self.isSubtype_uncached(s)
+        memo[key] = (self, s, ret)
+        if content_key is not None:
+            memo[content_key] = (self, s, ret)
+        return ret
+
+    def content_key(self):
+        ''' Hashable form of the schema document.
+            Not cached on self, since checkers can be copied and
+            modified after a key was taken. '''
+        try:
+            return (type(self), json.dumps(self, sort_keys=True))
+        except (TypeError, ValueError):
+            # Not a plain document; only equal to itself.
+            return (type(self), id(self))
+
+    def isSubtype_uncached(self, s):
         #
         # if self == s or is_bot(self) or is_top(s):
+        # An uninhabited lhs is a subtype of anything, without looking at
+        # the rhs at all.
         if is_bot(self) or is_top(s):
             return True
         #
-        if (not is_bot(self) and is_bot(s)) \
-                or (is_top(self) and not is_top(s)):
+        # Past this point, self is not bot and s is not top.
+        if is_bot(s) or is_top(self):
             return False
         #
+        # The table skips the type-specific checks, and with them the
+        # reasons they record, so it is only used when nobody is
+        # collecting reasons.
+        if not ExplainContext.is_active():
+            rhs_types = _subtype_candidate_types.get(self.type)
+            if rhs_types is not None and s.type not in rhs_types:
+                return False
+        #
         return self.subtype_enum(s) and self._isSubtype(s)
 
     def isSubtype_nonTrivial(self, s):
@@ -167,6 +335,15 @@ class JSONschema(dict, metaclass=UninhabitedMeta):
 
     def subtype_enum(self, s):
         if self.hasEnum():
+            # Enum values of a simplified schema are valid against
+            # that schema, so values that all appear in the rhs enum
+            # need not be validated one by one.
+            if s.hasEnum():
+                lhs_enum = utils.enum_key_set(self.enum)
+                if lhs_enum is not None:
+                    rhs_enum = utils.enum_key_set(s.enum)
+                    if rhs_enum is not None and lhs_enum <= rhs_enum:
+                        return True
             valid_enum = utils.get_valid_enum_vals(self.enum, s)
             # no need to check individual elements
             # as enum values are unique by definition
@@ -181,8 +358,23 @@ class JSONschema(dict, metaclass=UninhabitedMeta):
 
         if s.isBoolean():
             if s.type == "anyOf":
+                if s.typemask & _covering_type_bits.get(self.type, 0):
+                    # Some branch accepts every instance of self's type.
+                    return True
                 if not s.nonTrivialJoin:
-                    return any(isSubtype_cb(self, i) for i in s.anyOf)
+                    if _parallel_branches(s.anyOf):
+                        return _any_branch_in_pool(
+                            lambda i: isSubtype_cb(self, i), s.anyOf)
+                    # Branches of the same type as self are the likeliest
+                    # to match, so try them before the others.
+                    t = self.type
+                    for i in s.anyOf:
+                        if i.type == t and isSubtype_cb(self, i):
+                            return True
+                    for i in s.anyOf:
+                        if i.type != t and isSubtype_cb(self, i):
+                            return True
+                    return False
                 else:
                     return self.isSubtype_nonTrivial(s)
 
@@ -212,14 +404,14 @@ class JSONtop(JSONschema):
     def _join(self, s):
         return self
 
-    def _isSubtype(self, s):
-
-        def _isTopSubtype(s1, s2):
-            if is_top(s2):
-                return True
-            return False
+    @staticmethod
+    def _isTopSubtype(s1, s2):
+        if is_top(s2):
+            return True
+        return False
 
-        super().isSubtype_handle_rhs(s, _isTopSubtype)
+    def _isSubtype(self, s):
+        super().isSubtype_handle_rhs(s, JSONtop._isTopSubtype)
 
     def __eq__(self, s):
         if is_top(s):
@@ -252,14 +444,14 @@ class JSONbot(JSONschema):
     def _join(self, s):
         return s
 
-    def _isSubtype(self, s):
-
-        def _isBotSubtype(s1, s2):
-            if is_bot(s2):
-                return True
-            return False
+    @staticmethod
+    def _isBotSubtype(s1, s2):
+        if is_bot(s2):
+            return True
+        return False
 
-        super().isSubtype_handle_rhs(s, _isBotSubtype)
+    def _isSubtype(self, s):
+        super().isSubtype_handle_rhs(s, JSONbot._isBotSubtype)
 
     def __eq__(self, s):
         if is_bot(s):
@@ -281,6 +473,13 @@ def is_bot(obj):
         or (isinstance(obj, JSONschema) and obj.isUninhabited())
 
 
+def is_same_schema(s1, s2):
+    ''' Structural equality of two simplified schemas.
+        Only meaningful for freshly simplified schemas, whose internal state
+        is derived from their dict content; results of meet/join are not. '''
+    return s1 is s2 or (type(s1) is type(s2) and dict.__eq__(s1, s2))
+
+
 class JSONTypeString(JSONschema):
 
     def __init__(self, s):
@@ -303,6 +502,10 @@ class JSONTypeString(JSONschema):
         # See comment below at updateInternalState()
         # or self.range_with_pattern == None
 
+    def isUnconstrained(self):
+        return not self.hasEnum() and self.pattern == "" \
+            and self.minLength == 0 and self.maxLength == I.inf
+
     def updateInternalState(self):
         self.interval = I.closed(self.minLength, self.maxLength)
         #
@@ -365,41 +568,41 @@ class JSONTypeString(JSONschema):
 
         return _joinString(self, s)
 
-    def _isSubtype(self, s):
-
-        def _isStringSubtype(s1, s2):
-            if s2.type == "string":
-                is_sub_interval = s1.interval in s2.interval
-                if not is_sub_interval and not s1.pattern and not s2.pattern:
-                    return False
-                #
-                if s1.pattern == s2.pattern:
-                    return True
-                elif s1.hasEnum():
-                    return super(JSONTypeString, s1).subtype_enum(s2)
+    @staticmethod
+    def _isStringSubtype(s1, s2):
+        if s2.type == "string":
+            is_sub_interval = s1.interval in s2.interval
+            if not is_sub_interval and not s1.pattern and not s2.pattern:
+                return False
+            #
+            if s1.pattern == s2.pattern:
+                return True
+            elif s1.hasEnum():
+                return super(JSONTypeString, s1).subtype_enum(s2)
+            else:
+                if s1.minLength == 0 and s1.maxLength == I.inf:
+                    pattern1 = s1.pattern
                 else:
-                    if s1.minLength == 0 and s1.maxLength == I.inf:
-                        pattern1 = s1.pattern
-                    else:
-                        s1_range = utils.string_range_to_regex(
-                            s1.minLength, s1.maxLength)
-                        pattern1 = utils.regex_meet(s1_range, s1.pattern)
+                    s1_range = utils.string_range_to_regex(
+                        s1.minLength, s1.maxLength)
+                    pattern1 = utils.regex_meet(s1_range, s1.pattern)
 
-                    if s2.minLength == 0 and s2.maxLength == I.inf:
-                        pattern2 = s2.pattern
-                    else:
-                        s2_range = utils.string_range_to_regex(
-                            s2.minLength, s2.maxLength)
-                        pattern2 = utils.regex_meet(s2_range, s2.pattern)
+                if s2.minLength == 0 and s2.maxLength == I.inf:
+                    pattern2 = s2.pattern
+                else:
+                    s2_range = utils.string_range_to_regex(
+                        s2.minLength, s2.maxLength)
+                    pattern2 = utils.regex_meet(s2_range, s2.pattern)
 
-                    if utils.regex_isSubset(pattern1, pattern2):
-                        return True
-                    else:
-                        return False
-            else:
-                return False
+                if utils.regex_isSubset(pattern1, pattern2):
+                    return True
+                else:
+                    return False
+        else:
+            return False
 
-        return super().isSubtype_handle_rhs(s, _isStringSubtype)
+    def _isSubtype(self, s):
+        return super().isSubtype_handle_rhs(s, JSONTypeString._isStringSubtype)
 
     @staticmethod
     def neg(s):
@@ -438,14 +641,45 @@ class JSONTypeNumeric(JSONschema):
         self.exclusiveMinimum = self.get("exclusiveMinimum", False)
         self.exclusiveMaximum = self.get("exclusiveMaximum", False)
         self.multipleOf = self.get("multipleOf", None)
+        # Exact value of multipleOf, so that divisibility checks don't
+        # suffer from float rounding (e.g. 0.3 % 0.1 != 0).
+        if type(self.multipleOf) is int:
+            self._mof_frac = Fraction(self.multipleOf)
+        elif utils.is_num(self.multipleOf):
+            self._mof_frac = Fraction(str(self.multipleOf))
+        else:
+            self._mof_frac = None
 
     def _isUninhabited(self):
-        return self.interval.empty \
+        return self.empty \
             or utils.is_num(self.multipleOf) and self.multipleOf > self.maximum
 
+    def isUnconstrained(self):
+        return not self.hasEnum() and self.multipleOf is None \
+            and self.minimum == -I.inf and self.maximum == I.inf
+
     def updateInternalState(self):
         self.build_interval_draft4()
 
+    def build_bounds(self, lo_excl, hi_excl):
+        # Plain tuple mirror of self.interval, so that containment
+        # checks are a few comparisons instead of portion operations.
+        lo_excl = bool(lo_excl) or self.minimum == -I.inf
+        hi_excl = bool(hi_excl) or self.maximum == I.inf
+        self.bounds = (self.minimum, self.maximum, lo_excl, hi_excl)
+        self.empty = self.minimum > self.maximum \
+            or (self.minimum == self.maximum and (lo_excl or hi_excl))
+
+    def is_sub_interval(self, s):
+        if self.empty:
+            return True
+        if s.empty:
+            return False
+        lo1, hi1, lo1_excl, hi1_excl = self.bounds
+        lo2, hi2, lo2_excl, hi2_excl = s.bounds
+        return (lo1 > lo2 or (lo1 == lo2 and (lo1_excl or not lo2_excl))) \
+            and (hi1 < hi2 or (hi1 == hi2 and (hi1_excl or not hi2_excl)))
+
     def _meet(self, s):
 
         def _meetNumeric(s1, s2):
@@ -478,6 +712,16 @@ class JSONTypeNumeric(JSONschema):
         # join integer with number
         return JSONanyOf({"anyOf": [self, s]})
 
+    def subtype_multipleOf(self, s):
+        ''' Is every multiple of self.multipleOf also a multiple of s.multipleOf?
+            False unless both schemas have a multipleOf. '''
+        if self._mof_frac is None or s._mof_frac is None:
+            return False
+        if type(self.multipleOf) is int and type(s.multipleOf) is int:
+            # Common case, exact without going through Fraction.
+            return self.multipleOf % s.multipleOf == 0
+        return (self._mof_frac / s._mof_frac).denominator == 1
+
 
 class JSONTypeInteger(JSONTypeNumeric):
 
@@ -513,6 +757,7 @@ class JSONTypeInteger(JSONTypeNumeric):
             self.minimum, self.maximum, self.multipleOf)
 
         self.interval = I.closed(self.minimum, self.maximum)
+        self.build_bounds(False, False)
 
     def _join(self, s):
 
@@ -545,30 +790,30 @@ class JSONTypeInteger(JSONTypeNumeric):
 
         return _joinInteger(self, s)
 
-    def _isSubtype(self, s):
-
-        def _isIntegerSubtype(s1, s2):
-            if s2.type in definitions.Jnumeric:
-                if s1.hasEnum():
-                    return super(JSONTypeInteger, s1).subtype_enum(s2)
-                #
-                is_sub_interval = s1.interval in s2.interval
-                if not is_sub_interval:
-                    print_db("num__00")
-                    return False
-                #
-                if (s1.multipleOf == s2.multipleOf) \
-                        or (s1.multipleOf != None and s2.multipleOf == None) \
-                        or (s1.multipleOf != None and s2.multipleOf != None and s1.multipleOf % s2.multipleOf == 0) \
-                        or (s1.multipleOf == None and s2.multipleOf == 1):
-                    print_db("num__01")
-                    return True
-            # elif s2.type == "anyOf":
-            #     return self._isSubtype_nonTrivial(s)
-            else:
+    @staticmethod
+    def _isIntegerSubtype(s1, s2):
+        if s2.type in definitions.Jnumeric:
+            if s1.hasEnum():
+                return super(JSONTypeInteger, s1).subtype_enum(s2)
+            #
+            is_sub_interval = s1.is_sub_interval(s2)
+            if not is_sub_interval:
+                print_db("num__00")
                 return False
+            #
+            if (s1.multipleOf == s2.multipleOf) \
+                    or (s1.multipleOf != None and s2.multipleOf == None) \
+                    or s1.subtype_multipleOf(s2) \
+                    or (s1.multipleOf == None and s2.multipleOf == 1):
+                print_db("num__01")
+                return True
+        # elif s2.type == "anyOf":
+        #     return self._isSubtype_nonTrivial(s)
+        else:
+            return False
 
-        return super().isSubtype_handle_rhs(s, _isIntegerSubtype)
+    def _isSubtype(self, s):
+        return super().isSubtype_handle_rhs(s, JSONTypeInteger._isIntegerSubtype)
 
     def _isSubtype_nonTrivial(self, s):
         print_db("Nontrivial Integer subtype")
@@ -697,6 +942,7 @@ class JSONTypeNumber(JSONTypeNumeric):
             self.interval = I.closedopen(self.minimum, self.maximum)
         else:
             self.interval = I.closed(self.minimum, self.maximum)
+        self.build_bounds(self.exclusiveMinimum, self.exclusiveMaximum)
 
     def _join(self, s):
 
@@ -707,11 +953,11 @@ class JSONTypeNumber(JSONTypeNumeric):
                     joined_interval = s1.interval | s2.interval
                     if utils.is_num(joined_interval.lower):
                         ret["minimum"] = joined_interval.lower
-                        if not joined_interval.left:
+                        if joined_interval.left == I.OPEN:
                             ret["exclusiveMinimum"] = True
                     if utils.is_num(joined_interval.upper):
                         ret["maximum"] = joined_interval.upper
-                        if not joined_interval.right:
+                        if joined_interval.right == I.OPEN:
                             ret["exclusiveMaximum"] = True
                     gcd = utils.gcd(s1.multipleOf, s2.multipleOf)
                     if utils.is_num(gcd) and gcd != 1:
@@ -729,38 +975,38 @@ class JSONTypeNumber(JSONTypeNumeric):
 
         return _joinNumber(self, s)
 
-    def _isSubtype(self, s):
-
-        def _isNumberSubtype(s1, s2):
-            if s2.type == "number":
-                if s1.hasEnum():
-                    return super(JSONTypeNumber, s1).subtype_enum(s2)
-                is_sub_interval = s1.interval in s2.interval
-                if not is_sub_interval:
-                    print_db("num__00")
-                    return False
-                #
-                if (s1.multipleOf == s2.multipleOf) \
-                        or (s1.multipleOf != None and s2.multipleOf == None) \
-                        or (s1.multipleOf != None and s2.multipleOf != None and s1.multipleOf % s2.multipleOf == 0) \
-                        or (utils.is_int_equiv(s1.multipleOf) and s2.multipleOf == None):
-                    print_db("num__01")
-                    return True
-            elif s2.type == "integer":
-                is_sub_interval = s1.interval in s2.interval
-                if not is_sub_interval:
-                    print_db("num__02")
-                    return False
-                #
-                if utils.is_int_equiv(s1.multipleOf) and \
-                        (s2.multipleOf == None or ((s1.multipleOf != None and s2.multipleOf != None and s1.multipleOf % s2.multipleOf == 0))):
-                    print_db("num__03")
-                    return True
-            else:
-                print_db("num__04")
+    @staticmethod
+    def _isNumberSubtype(s1, s2):
+        if s2.type == "number":
+            if s1.hasEnum():
+                return super(JSONTypeNumber, s1).subtype_enum(s2)
+            is_sub_interval = s1.is_sub_interval(s2)
+            if not is_sub_interval:
+                print_db("num__00")
+                return False
+            #
+            if (s1.multipleOf == s2.multipleOf) \
+                    or (s1.multipleOf != None and s2.multipleOf == None) \
+                    or s1.subtype_multipleOf(s2) \
+                    or (utils.is_int_equiv(s1.multipleOf) and s2.multipleOf == None):
+                print_db("num__01")
+                return True
+        elif s2.type == "integer":
+            is_sub_interval = s1.is_sub_interval(s2)
+            if not is_sub_interval:
+                print_db("num__02")
                 return False
+            #
+            if utils.is_int_equiv(s1.multipleOf) and \
+                    (s2.multipleOf == None or s1.subtype_multipleOf(s2)):
+                print_db("num__03")
+                return True
+        else:
+            print_db("num__04")
+            return False
 
-        return super().isSubtype_handle_rhs(s, _isNumberSubtype)
+    def _isSubtype(self, s):
+        return super().isSubtype_handle_rhs(s, JSONTypeNumber._isNumberSubtype)
 
     @staticmethod
     def neg(s):
@@ -854,6 +1100,9 @@ class JSONTypeBoolean(JSONschema):
     def _isUninhabited(self):
         return False
 
+    def isUnconstrained(self):
+        return not self.hasEnum()
+
     def _meet(self, s):
 
         def _meetBoolean(s1, s2):
@@ -875,15 +1124,15 @@ class JSONTypeBoolean(JSONschema):
 
         return super().meet_handle_rhs(s, _meetBoolean)
 
-    def _isSubtype(self, s):
-
-        def _isBooleanSubtype(self, s2):
-            if s2.type == "boolean":
-                return True
-            else:
-                return False
+    @staticmethod
+    def _isBooleanSubtype(s1, s2):
+        if s2.type == "boolean":
+            return True
+        else:
+            return False
 
-        return super().isSubtype_handle_rhs(s, _isBooleanSubtype)
+    def _isSubtype(self, s):
+        return super().isSubtype_handle_rhs(s, JSONTypeBoolean._isBooleanSubtype)
 
     @staticmethod
     def neg(s):
@@ -910,6 +1159,9 @@ class JSONTypeNull(JSONschema):
     def _isUninhabited(self):
         return False
 
+    def isUnconstrained(self):
+        return not self.hasEnum()
+
     def _meet(self, s):
 
         def _meetNull(s1, s2):
@@ -921,15 +1173,15 @@ class JSONTypeNull(JSONschema):
 
         return super().meet_handle_rhs(s, _meetNull)
 
-    def _isSubtype(self, s):
-
-        def _isNullSubtype(self, s2):
-            if s2.type == "null":
-                return True
-            else:
-                return False
+    @staticmethod
+    def _isNullSubtype(s1, s2):
+        if s2.type == "null":
+            return True
+        else:
+            return False
 
-        return super().isSubtype_handle_rhs(s, _isNullSubtype)
+    def _isSubtype(self, s):
+        return super().isSubtype_handle_rhs(s, JSONTypeNull._isNullSubtype)
 
     @staticmethod
     def neg(s):
@@ -1091,153 +1343,153 @@ class JSONTypeArray(JSONschema):
 
         return super().meet_handle_rhs(s, _meetArray)
 
-    def _isSubtype(self, s):
-
-        def _isArraySubtype(s1, s2):
-            if s2.type != "array":
-                return False
-            if s1.hasEnum():
-                return super(JSONTypeArray, s1).subtype_enum(s2)
-            #
-            # -- minItems and maxItems
-            is_sub_interval = s1.interval in s2.interval
-            if not is_sub_interval:
-                print_db("__01__")
-                return False
-            #
-            # -- uniqueItemsue
-            # TODO Double-check. Could be more subtle?
-            if not s1.uniqueItems and s2.uniqueItems:
-                print_db("__02__")
-                return False
-            #
-            # -- contains
-            if s2.contains is not None:
-                if s1.contains is not None:
-                    if not s1.contains.isSubtype(s2.contains):
-                        print_db("contains__01")
+    @staticmethod
+    def _isArraySubtype(s1, s2):
+        if s2.type != "array":
+            return False
+        if s1.hasEnum():
+            return super(JSONTypeArray, s1).subtype_enum(s2)
+        #
+        # -- minItems and maxItems
+        is_sub_interval = s1.interval in s2.interval
+        if not is_sub_interval:
+            print_db("__01__")
+            return False
+        #
+        # -- uniqueItemsue
+        # TODO Double-check. Could be more subtle?
+        if not s1.uniqueItems and s2.uniqueItems:
+            print_db("__02__")
+            return False
+        #
+        # -- contains
+        if s2.contains is not None:
+            if s1.contains is not None:
+                if not s1.contains.isSubtype(s2.contains):
+                    print_db("contains__01")
+                    return False
+            else:
+                # LHS has no contains, RHS requires contains.
+                # Check if all items of LHS are subtypes of RHS.contains
+                if utils.is_dict(s1.items_):
+                    if not s1.items_.isSubtype(s2.contains):
+                        print_db("contains__02")
                         return False
+                elif utils.is_list(s1.items_):
+                    if not any(item.isSubtype(s2.contains)
+                               for item in s1.items_):
+                        print_db("contains__03")
+                        return False
+        #
+        # -- items = {not empty}
+        # no need to check additionalItems
+        if utils.is_dict(s1.items_):
+            if utils.is_dict(s2.items_):
+                print_db(s1.items_)
+                print_db(s2.items_)
+                if s1.items_.isSubtype(s2.items_):
+                    print_db("__05__")
+                    return True
                 else:
-                    # LHS has no contains, RHS requires contains.
-                    # Check if all items of LHS are subtypes of RHS.contains
-                    if utils.is_dict(s1.items_):
-                        if not s1.items_.isSubtype(s2.contains):
-                            print_db("contains__02")
+                    print_db("__06__")
+                    return False
+            elif utils.is_list(s2.items_):
+                if s2.additionalItems == False:
+                    print_db("__07__")
+                    return False
+                elif s2.additionalItems == True:
+                    for i in s2.items_:
+                        if not s1.items_.isSubtype(i):
+                            print_db("__08__")
                             return False
-                    elif utils.is_list(s1.items_):
-                        if not any(item.isSubtype(s2.contains)
-                                   for item in s1.items_):
-                            print_db("contains__03")
+                    print_db("__09__")
+                    return True
+                elif utils.is_dict(s2.additionalItems):
+                    for i in s2.items_:
+                        if not s1.items_.isSubtype(i):
+                            print_db("__10__")
                             return False
-            #
-            # -- items = {not empty}
-            # no need to check additionalItems
-            if utils.is_dict(s1.items_):
-                if utils.is_dict(s2.items_):
-                    print_db(s1.items_)
-                    print_db(s2.items_)
-                    if s1.items_.isSubtype(s2.items_):
-                        print_db("__05__")
+                    print_db(type(s1.items_), s1.items_)
+                    print_db(type(s2.additionalItems),
+                             s2.additionalItems)
+                    if s1.items_.isSubtype(s2.additionalItems):
+                        print_db("__11__")
                         return True
                     else:
-                        print_db("__06__")
-                        return False
-                elif utils.is_list(s2.items_):
-                    if s2.additionalItems == False:
-                        print_db("__07__")
+                        print_db("__12__")
                         return False
-                    elif s2.additionalItems == True:
-                        for i in s2.items_:
-                            if not s1.items_.isSubtype(i):
-                                print_db("__08__")
-                                return False
-                        print_db("__09__")
+        #
+        elif utils.is_list(s1.items_):
+            print_db("lhs is list")
+            if utils.is_dict(s2.items_):
+                if s1.additionalItems == False:
+                    for i in s1.items_:
+                        if not i.isSubtype(s2.items_):
+                            print_db("__13__")
+                            return False
+                    print_db("__14__")
+                    return True
+                elif s1.additionalItems == True:
+                    for i in s1.items_:
+                        if not i.isSubtype(s2.items_):
+                            return False
+                        # since s1.additional items is True,
+                        # then TOP should also be a subtype of
+                        # s2.items
+                    if JSONtop().isSubtype(s2.items_):
                         return True
-                    elif utils.is_dict(s2.additionalItems):
-                        for i in s2.items_:
-                            if not s1.items_.isSubtype(i):
-                                print_db("__10__")
-                                return False
-                        print_db(type(s1.items_), s1.items_)
-                        print_db(type(s2.additionalItems),
-                                 s2.additionalItems)
-                        if s1.items_.isSubtype(s2.additionalItems):
-                            print_db("__11__")
-                            return True
-                        else:
-                            print_db("__12__")
+                    return False
+                elif utils.is_dict(s1.additionalItems):
+                    for i in s1.items_:
+                        if not i.isSubtype(s2.items_):
                             return False
-            #
-            elif utils.is_list(s1.items_):
-                print_db("lhs is list")
-                if utils.is_dict(s2.items_):
-                    if s1.additionalItems == False:
-                        for i in s1.items_:
-                            if not i.isSubtype(s2.items_):
-                                print_db("__13__")
-                                return False
-                        print_db("__14__")
+                    if s1.additionalItems.isSubtype(s2.items_):
                         return True
-                    elif s1.additionalItems == True:
-                        for i in s1.items_:
-                            if not i.isSubtype(s2.items_):
-                                return False
-                            # since s1.additional items is True,
-                            # then TOP should also be a subtype of
-                            # s2.items
-                        if JSONtop().isSubtype(s2.items_):
-                            return True
+                    else:
                         return False
-                    elif utils.is_dict(s1.additionalItems):
-                        for i in s1.items_:
-                            if not i.isSubtype(s2.items_):
-                                return False
-                        if s1.additionalItems.isSubtype(s2.items_):
-                            return True
-                        else:
-                            return False
-                # now lhs and rhs are lists
-                elif utils.is_list(s2.items_):
-                    print_db("lhs & rhs are lists")
-                    len1 = len(s1.items_)
-                    len2 = len(s2.items_)
-                    for i, j in zip(s1.items_, s2.items_):
-                        if not i.isSubtype(j):
+            # now lhs and rhs are lists
+            elif utils.is_list(s2.items_):
+                print_db("lhs & rhs are lists")
+                len1 = len(s1.items_)
+                len2 = len(s2.items_)
+                for i, j in zip(s1.items_, s2.items_):
+                    if not i.isSubtype(j):
+                        return False
+                if len1 == len2:
+                    print_db("len1 == len2")
+                    if s1.additionalItems == s2.additionalItems:
+                        return True
+                    elif s1.additionalItems == True and s2.additionalItems == False:
+                        return False
+                    elif s1.additionalItems == False and s2.additionalItems == True:
+                        return True
+                    else:
+                        return s1.additionalItems.isSubtype(s2.additionalItems)
+                elif len1 > len2:
+                    diff = len1 - len2
+                    for i in range(len1-diff, len1):
+                        if s2.additionalItems == False:
                             return False
-                    if len1 == len2:
-                        print_db("len1 == len2")
-                        if s1.additionalItems == s2.additionalItems:
+                        elif s2.additionalItems == True:
                             return True
-                        elif s1.additionalItems == True and s2.additionalItems == False:
+                        elif not s1.items_[i].isSubtype(s2.additionalItems):
+                            print_db("9999")
                             return False
-                        elif s1.additionalItems == False and s2.additionalItems == True:
+                    print_db("8888")
+                    return True
+                else:  # len2 > len 1
+                    diff = len2 - len1
+                    for i in range(len2 - diff, len2):
+                        if s1.additionalItems == False:
                             return True
-                        else:
-                            return s1.additionalItems.isSubtype(s2.additionalItems)
-                    elif len1 > len2:
-                        diff = len1 - len2
-                        for i in range(len1-diff, len1):
-                            if s2.additionalItems == False:
-                                return False
-                            elif s2.additionalItems == True:
-                                return True
-                            elif not s1.items_[i].isSubtype(s2.additionalItems):
-                                print_db("9999")
-                                return False
-                        print_db("8888")
-                        return True
-                    else:  # len2 > len 1
-                        diff = len2 - len1
-                        for i in range(len2 - diff, len2):
-                            if s1.additionalItems == False:
-                                return True
-                            elif s1.additionalItems == True:
-                                return False
-                            elif not s1.additionalItems.isSubtype(s2.items_[i]):
-                                return False
-                        return s1.additionalItems.isSubtype(s2.additionalItems)
+                        elif s1.additionalItems == True:
+                            return False
+                        elif not s1.additionalItems.isSubtype(s2.items_[i]):
+                            return False
+                    return s1.additionalItems.isSubtype(s2.additionalItems)
 
-        return super().isSubtype_handle_rhs(s, _isArraySubtype)
+    def _isSubtype(self, s):
+        return super().isSubtype_handle_rhs(s, JSONTypeArray._isArraySubtype)
 
     @staticmethod
     def neg(s):
@@ -1318,6 +1570,10 @@ class JSONTypeObject(JSONschema):
             or required_is_uninhabited(self)
 
     def updateInternalState(self):
+        # Key sets for the subtype checks, recomputed here because meet
+        # assigns properties and required after construction.
+        self._prop_keys = frozenset(self.properties)
+        self._required = frozenset(self.required)
         self.compute_actual_min_max_Properties()
         self.interval = I.closed(self.minProperties, self.maxProperties)
         if len(self.properties) == self.maxProperties \
@@ -1339,7 +1595,7 @@ class JSONTypeObject(JSONschema):
         def _meetObject(s1, s2):
             if s2.type == "object":
                 ret = JSONTypeObject({})
-                ret.required = list(set(s1.required).union(s2.required))
+                ret.required = list(s1._required | s2._required)
                 ret.minProperties = max(s1.minProperties, s2.minProperties)
                 ret.maxProperties = min(s1.maxProperties, s2.maxProperties)
                 #
@@ -1390,205 +1646,218 @@ class JSONTypeObject(JSONschema):
 
         return super().meet_handle_rhs(s, _meetObject)
 
-    def _isSubtype(self, s):
-
-        def _isObjectSubtype(s1, s2):
-            ''' The general intuition is that a json object with more keys is more restrictive 
-                than a similar object with fewer keys. 
+    @staticmethod
+    def get_schema_for_key(k, s):
+        ''' Searches for matching key and get the corresponding schema(s).
+            Returns iterable because if a key matches more than one pattern, 
+            that key schema has to match all corresponding patterns schemas.
+        '''
+        if k in s.properties.keys():
+            return [s.properties[k]]
+        else:
+            ret = []
+            for k_ in s.patternProperties.keys():
+                if utils.regex_matches_string(k_, k):
+                    # in case a key has to be checked against patternProperties,
+                    # it has to adhere to all schemas which have pattern matching the key.
+                    ret.append(s.patternProperties[k_])
+            if ret:
+                return ret
 
-                E.g.: if corresponding keys have same schemas, then 
-                {name: {..}, age: {..}} <: {name: {..}}
-                {name: {..}, age: {..}} />: {name: {..}}
+        return [s.additionalProperties]
 
-                So the subtype checking is divided into two major parts:
-                I) lhs keys/patterns/additional should be a superset of rhs
-                II) schemas of comparable keys should have lhs <: rhs
-            '''
-            if s2.type != "object":
-                return False
-            if s1.hasEnum():
-                return super(JSONTypeObject, s1).subtype_enum(s2)
-            # Check properties range
-            is_sub_interval = s1.interval in s2.interval
-            if not is_sub_interval:
-                print_db(s1.interval, s1)
-                print_db(s2.interval, s2)
-                print_db("__00__")
-                return False
-            #
-            # else:
-            #     # If ranges are ok, check another trivial case of almost identical objects.
-            #     # This is some sort of performance heuristic.
-            #     if set(s1.required).issuperset(s2.required) \
-            #         and s1.properties == s2.properties \
-            #         and s1.patternProperties == s2.patternProperties \
-            #         and (s1.additionalProperties == s2.additionalProperties
-            #              or (utils.is_dict(s1.additionalProperties)
-            #                  and s1.additionalProperties.isSubtype(s2.additionalProperties))):
-            #         print_db("__01__")
-            #         return True
-            # #
-
-            def get_schema_for_key(k, s):
-                ''' Searches for matching key and get the corresponding schema(s).
-                    Returns iterable because if a key matches more than one pattern, 
-                    that key schema has to match all corresponding patterns schemas.
-                '''
-                if k in s.properties.keys():
-                    return [s.properties[k]]
-                else:
-                    ret = []
-                    for k_ in s.patternProperties.keys():
-                        if utils.regex_matches_string(k_, k):
-                            # in case a key has to be checked against patternProperties,
-                            # it has to adhere to all schemas which have pattern matching the key.
-                            ret.append(s.patternProperties[k_])
-                    if ret:
-                        return ret
+    @staticmethod
+    def _isObjectSubtype(s1, s2):
+        ''' The general intuition is that a json object with more keys is more restrictive 
+            than a similar object with fewer keys. 
+
+            E.g.: if corresponding keys have same schemas, then 
+            {name: {..}, age: {..}} <: {name: {..}}
+            {name: {..}, age: {..}} />: {name: {..}}
+
+            So the subtype checking is divided into two major parts:
+            I) lhs keys/patterns/additional should be a superset of rhs
+            II) schemas of comparable keys should have lhs <: rhs
+        '''
+        if s2.type != "object":
+            return False
+        if s1.hasEnum():
+            return super(JSONTypeObject, s1).subtype_enum(s2)
+        # Check properties range
+        is_sub_interval = s1.interval in s2.interval
+        if not is_sub_interval:
+            print_db(s1.interval, s1)
+            print_db(s2.interval, s2)
+            print_db("__00__")
+            return False
+        #
+        # else:
+        #     # If ranges are ok, check another trivial case of almost identical objects.
+        #     # This is some sort of performance heuristic.
+        #     if set(s1.required).issuperset(s2.required) \
+        #         and s1.properties == s2.properties \
+        #         and s1.patternProperties == s2.patternProperties \
+        #         and (s1.additionalProperties == s2.additionalProperties
+        #              or (utils.is_dict(s1.additionalProperties)
+        #                  and s1.additionalProperties.isSubtype(s2.additionalProperties))):
+        #         print_db("__01__")
+        #         return True
+        # #
+
+        # Check that required keys satisfy subtyping.
+        # lhs required keys should be superset of rhs required keys.
+        if not s2._required <= s1._required:
+            print_db("__02__")
+            return False
+        # If required keys are properly defined, check their corresponding
+        # schemas and make sure they are subtypes.
+        # This is required because you could have a required key which does not
+        # have an explicit schema defined by the json object.
 
-                return [s.additionalProperties]
+        else:
+            # rhs required keys are all required on the lhs too.
+            for k in s2._required:
+                for lhs_ in JSONTypeObject.get_schema_for_key(k, s1):
+                    for rhs_ in JSONTypeObject.get_schema_for_key(k, s2):
+                        if lhs_:
+                            if rhs_:
+                                if not lhs_.isSubtype(rhs_):
+                                    print_db(k, "LHS", lhs_, "RHS", rhs_)
+                                    print_db("!!__03__")
+                                    return False
+                            else:
+                                print_db("__04__")
+                                return False
 
-            # Check that required keys satisfy subtyping.
-            # lhs required keys should be superset of rhs required keys.
-            if not set(s1.required).issuperset(s2.required):
-                print_db("__02__")
+        extra_keys_on_rhs = set(s2._prop_keys - s1._prop_keys)
+        for k in extra_keys_on_rhs.copy():
+            if all(map(is_top, JSONTypeObject.get_schema_for_key(k, s2))):
+                extra_keys_on_rhs.remove(k)
+                continue
+            lhs_schemas = [v for k_, v in s1.patternProperties.items()
+                           if utils.regex_matches_string(k_, k)]
+            if lhs_schemas:
+                # The key's value has to match all of these on the lhs,
+                # so it is enough for one of them to be a subtype.
+                if not any(lhs_.isSubtype(s2.properties[k]) for lhs_ in lhs_schemas):
+                    print_db("__05__")
+                    return False
+                extra_keys_on_rhs.remove(k)
+        # if extra_keys_on_rhs:
+            # if not s1.additionalProperties:
+            #     print_db("?__05__")
+            #     return False
+            # else:
+        for k in extra_keys_on_rhs:
+            if is_bot(s1.additionalProperties):
+                continue
+            elif is_top(s1.additionalProperties):
+                print_db("__06__")
                 return False
-            # If required keys are properly defined, check their corresponding
-            # schemas and make sure they are subtypes.
-            # This is required because you could have a required key which does not
-            # have an explicit schema defined by the json object.
+            # for s in JSONTypeObject.get_schema_for_key(k, s1):
+            #     if not is_bot(s):
+            #         continue
+            #     elif is_bot(s2.):
+            #         return False
+                # print("-->", s)
+                # if is_top(s) and not is_top(s2.properties[k]) or not s.isSubtype(s2.properties[k]):
+                #     print_db("__06__")
+                #     return False
 
+        # Bit i of covered_by[k] is set when rhs pattern k is included in
+        # the i-th lhs pattern. Each pattern pair is compared only once,
+        # for both the extra rhs patterns here and the pairwise check below.
+        lhs_patterns = list(s1.patternProperties.keys())
+        covered_by = {}
+        for k in s2.patternProperties.keys():
+            mask = 0
+            for i, k_ in enumerate(lhs_patterns):
+                if utils.regex_isSubset(k, k_):
+                    mask |= 1 << i
+            covered_by[k] = mask
+        extra_patterns_on_rhs = [k for k, mask in covered_by.items() if not mask]
+        if extra_patterns_on_rhs:
+            if not s1.additionalProperties:
+                print_db("__07__")
+                return False
             else:
-                for k in set(s1.required).intersection(s2.required):
-                    for lhs_ in get_schema_for_key(k, s1):
-                        for rhs_ in get_schema_for_key(k, s2):
-                            if lhs_:
-                                if rhs_:
-                                    if not lhs_.isSubtype(rhs_):
-                                        print_db(k, "LHS", lhs_, "RHS", rhs_)
-                                        print_db("!!__03__")
-                                        return False
-                                else:
-                                    print_db("__04__")
-                                    return False
-
-            extra_keys_on_rhs = set(s2.properties.keys()).difference(
-                s1.properties.keys())
-            for k in extra_keys_on_rhs.copy():
-                if all(map(is_top, get_schema_for_key(k, s2))):
-                    extra_keys_on_rhs.remove(k)
-                    continue
-                for k_ in s1.patternProperties.keys():
-                    if utils.regex_matches_string(k_, k):
-                        extra_keys_on_rhs.remove(k)
-            # if extra_keys_on_rhs:
-                # if not s1.additionalProperties:
-                #     print_db("?__05__")
-                #     return False
-                # else:
-            for k in extra_keys_on_rhs:
-                if is_bot(s1.additionalProperties):
-                    continue
-                elif is_top(s1.additionalProperties):
-                    print_db("__06__")
-                    return False
-                # for s in get_schema_for_key(k, s1):
-                #     if not is_bot(s):
-                #         continue
-                #     elif is_bot(s2.):
-                #         return False
-                    # print("-->", s)
-                    # if is_top(s) and not is_top(s2.properties[k]) or not s.isSubtype(s2.properties[k]):
-                    #     print_db("__06__")
-                    #     return False
-
-            extra_patterns_on_rhs = set(s2.patternProperties.keys()).difference(
-                s1.patternProperties.keys())
-            for k in extra_patterns_on_rhs.copy():
-                for k_ in s1.patternProperties.keys():
-                    if utils.regex_isSubset(k, k_):
-                        extra_patterns_on_rhs.remove(k)
-            if extra_patterns_on_rhs:
-                if not s1.additionalProperties:
-                    print_db("__07__")
-                    return False
-                else:
-                    for k in extra_patterns_on_rhs:
-                        if not s1.additionalProperties.isSubtype(s2.patternProperties[k]):
-                            try:  # means regex k is infinite
-                                utils._cached_parse(k).cardinality()
-                            except OverflowError:
-                                print_db("__08__")
-                                return False
-            #
-            # missing_props_from_lhs = set(
-            #     s2.properties.keys()) - set(s1.properties.keys())
-            # for k in missing_props_from_lhs:
-            #     for k_ in s1.patternProperties.keys():
-            #         if utils.regex_matches_string(k_, k):
-            #             if not s1.patternProperties[k_].isSubtype(s2.properties[k]):
-            #                 return False
-
-                        # Now, lhs has a patternProperty which is subtype of a property on the rhs.
-                        # Ideally, at this point, I'd like to check that EVERY property matched by
-                        # this pattern also exist on the rhs.
-                        # from greenery.lego import parse
-                        # p = parse(k_)
-                        # try:
-                            # p.cardinality
-
-            # first, matching properties should be subtype pairwise
-            unmatched_lhs_props_keys = set(s1.properties.keys())
-            for k in s1.properties.keys():
-                if k in s2.properties.keys():
+                for k in extra_patterns_on_rhs:
+                    if not s1.additionalProperties.isSubtype(s2.patternProperties[k]):
+                        try:  # means regex k is infinite
+                            utils._cached_fsm(k).cardinality()
+                        except OverflowError:
+                            print_db("__08__")
+                            return False
+        #
+        # missing_props_from_lhs = set(
+        #     s2.properties.keys()) - set(s1.properties.keys())
+        # for k in missing_props_from_lhs:
+        #     for k_ in s1.patternProperties.keys():
+        #         if utils.regex_matches_string(k_, k):
+        #             if not s1.patternProperties[k_].isSubtype(s2.properties[k]):
+        #                 return False
+
+                    # Now, lhs has a patternProperty which is subtype of a property on the rhs.
+                    # Ideally, at this point, I'd like to check that EVERY property matched by
+                    # this pattern also exist on the rhs.
+                    # from greenery.lego import parse
+                    # p = parse(k_)
+                    # try:
+                        # p.cardinality
+
+        # first, matching properties should be subtype pairwise
+        for k in s1._prop_keys & s2._prop_keys:
+            if not s1.properties[k].isSubtype(s2.properties[k]):
+                return False
+        # for the remaining keys, make sure they either don't exist
+        # in rhs or if they, then their schemas should be sub-type
+        unmatched_lhs_props_keys = set(s1._prop_keys - s2._prop_keys)
+        for k in s1._prop_keys - s2._prop_keys:
+            for k_ in s2.patternProperties:
+                # if utils.regex_isSubset(k, k_):
+                if utils.regex_matches_string(k_, k):
                     unmatched_lhs_props_keys.discard(k)
-                    if not s1.properties[k].isSubtype(s2.properties[k]):
+                    if not s1.properties[k].isSubtype(s2.patternProperties[k_]):
                         return False
-                # for the remaining keys, make sure they either don't exist
-                # in rhs or if they, then their schemas should be sub-type
-                else:
-                    for k_ in s2.patternProperties:
-                        # if utils.regex_isSubset(k, k_):
-                        if utils.regex_matches_string(k_, k):
-                            unmatched_lhs_props_keys.discard(k)
-                            if not s1.properties[k].isSubtype(s2.patternProperties[k_]):
-                                return False
 
-            # second, matching patternProperties should be subtype pairwise
-            unmatched_lhs_pProps_keys = set(s1.patternProperties.keys())
-            for k in s1.patternProperties.keys():
-                for k_ in s2.patternProperties.keys():
-                    if utils.regex_isSubset(k_, k):
-                        unmatched_lhs_pProps_keys.discard(k)
-                        if not s1.patternProperties[k].isSubtype(s2.patternProperties[k_]):
-                            return False
-            # third,
+        # second, matching patternProperties should be subtype pairwise
+        matched = 0
+        for k_, mask in covered_by.items():
+            matched |= mask
+            for i, k in enumerate(lhs_patterns):
+                if mask >> i & 1:
+                    if not s1.patternProperties[k].isSubtype(s2.patternProperties[k_]):
+                        return False
+        unmatched_lhs_pProps_keys = set(
+            k for i, k in enumerate(lhs_patterns) if not matched >> i & 1)
+        # third,
 
-            # fourth,
-            if s2.additionalProperties == True:
+        # fourth,
+        if s2.additionalProperties == True:
+            return True
+        elif s2.additionalProperties == False:
+            if s1.additionalProperties == True:
+                return False
+            elif unmatched_lhs_props_keys or unmatched_lhs_pProps_keys:
+                return False
+            else:
                 return True
-            elif s2.additionalProperties == False:
-                if s1.additionalProperties == True:
+        else:
+            for k in unmatched_lhs_props_keys:
+                if not s1.properties[k].isSubtype(s2.additionalProperties):
                     return False
-                elif unmatched_lhs_props_keys or unmatched_lhs_pProps_keys:
+            for k in unmatched_lhs_pProps_keys:
+                if not s1.patternProperties[k].isSubtype(s2.additionalProperties):
                     return False
-                else:
-                    return True
+            if s1.additionalProperties == True:
+                return False
+            elif s1.additionalProperties == False:
+                return True
             else:
-                for k in unmatched_lhs_props_keys:
-                    if not s1.properties[k].isSubtype(s2.additionalProperties):
-                        return False
-                for k in unmatched_lhs_pProps_keys:
-                    if not s1.patternProperties[k].isSubtype(s2.additionalProperties):
-                        return False
-                if s1.additionalProperties == True:
-                    return False
-                elif s1.additionalProperties == False:
-                    return True
-                else:
-                    return s1.additionalProperties.isSubtype(s2.additionalProperties)
+                return s1.additionalProperties.isSubtype(s2.additionalProperties)
 
-        return super().isSubtype_handle_rhs(s, _isObjectSubtype)
+    def _isSubtype(self, s):
+        return super().isSubtype_handle_rhs(s, JSONTypeObject._isObjectSubtype)
 
     @staticmethod
     def neg(s):
@@ -1649,10 +1918,29 @@ class JSONanyOf(JSONschema):
     #         return super().__eq__(other)
 
     def updateInternalState(self):
-        for d_i in self.anyOf:
-            if "anyOf" in d_i.keys():
-                self.anyOf.extend(d_i.get("anyOf"))
-                self.anyOf.remove(d_i)
+        # Splice the branches of nested anyOfs in place of them, in a
+        # single pass over a worklist. self.anyOf is also the dict's
+        # 'anyOf' value, so it is updated in place.
+        if any("anyOf" in d_i.keys() for d_i in self.anyOf):
+            flat = []
+            todo = collections.deque(self.anyOf)
+            while todo:
+                d_i = todo.popleft()
+                if "anyOf" in d_i.keys():
+                    todo.extendleft(reversed(d_i.get("anyOf")))
+                else:
+                    flat.append(d_i)
+            self.anyOf[:] = flat
+        self.update_typemask()
+
+    def update_typemask(self):
+        ''' Set the bits of the types all of whose instances are accepted
+            by one of the branches. '''
+        mask = 0
+        for i in self.anyOf:
+            if i.isUnconstrained():
+                mask |= _type_bits[i.type]
+        self.typemask = mask
 
     def _isUninhabited(self):
         return all(is_bot(i) for i in self.anyOf)
@@ -1693,18 +1981,22 @@ class JSONanyOf(JSONschema):
                 # loop exited normally without breaking
                 # so add the single schema manually
                 self.anyOf.append(s)
+            self.update_typemask()
             return self
 
-    def _isSubtype(self, s):
-
-        def _isAnyofSubtype(s1, s2):
-            for s in s1.anyOf:
-                if not s.isSubtype(s2):
-                    print_db("RHS in anyOf subtype", s2)
-                    return False
-            return True
+    @staticmethod
+    def _isAnyofSubtype(s1, s2):
+        if _parallel_branches(s1.anyOf):
+            return not _any_branch_in_pool(
+                lambda s: not s.isSubtype(s2), s1.anyOf)
+        for s in s1.anyOf:
+            if not s.isSubtype(s2):
+                print_db("RHS in anyOf subtype", s2)
+                return False
+        return True
 
-        return _isAnyofSubtype(self, s)
+    def _isSubtype(self, s):
+        return JSONanyOf._isAnyofSubtype(self, s)
 
 
 def JSONallOfFactory(s):
@@ -1,24 +1,95 @@
 """
 Explain context module for collecting subschema check failure reasons.
 
-This module provides thread-local context for capturing why a subschema check
+This module provides a context-local store for capturing why a subschema check
 fails, enabling detailed error messages without modifying existing method signatures.
 """
 
-import threading
-from dataclasses import dataclass, field
-from typing import List, Optional
+import sys
+from collections.abc import Sequence
+from contextvars import ContextVar, Token
+from dataclasses import FrozenInstanceError
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# (code, message, path string) as recorded by ExplainContext.add_reason().
+# Reasons from add_debug_reason() keep the print_db() arguments instead:
+# the first one as code and a tuple of the others as message, both turned
+# into strings only when the reasons are read.
+_Reason = Tuple[Any, Any, Optional[str]]
+
+# "[code] " prefixes shared by all contexts, keyed by code. print_db()
+# may pass arbitrary objects as the code, so the cache is bounded.
+_PREFIX_CACHE: Dict[str, str] = {}
+_PREFIX_CACHE_SIZE = 256
+
+
+def _format_reasons(raw: Iterable[_Reason]) -> List[str]:
+    """Turn recorded reason tuples into human-readable strings."""
+    prefixes = _PREFIX_CACHE
+    formatted = []
+    for code, message, path in raw:
+        if code is None:
+            formatted.append(message)
+            continue
+        if message.__class__ is tuple:
+            code = str(code)
+            message = " ".join(str(a) for a in message)
+        prefix = prefixes.get(code)
+        if prefix is None:
+            prefix = "[" + code + "] "
+            if len(prefixes) < _PREFIX_CACHE_SIZE:
+                prefixes[sys.intern(code)] = prefix
+        formatted.append(prefix + message + " (at " + path + ")")
+    return formatted
+
+
+class _LazyReasons(Sequence):
+    """
+    Read-only sequence of reason strings, formatted on first access.
+
+    Compares equal to any list or tuple holding the same strings.
+    """
+
+    __slots__ = ("_raw", "_formatted")
+
+    def __init__(self, raw: Tuple[_Reason, ...]):
+        self._raw = raw
+        self._formatted: Optional[List[str]] = None
+
+    def _strings(self) -> List[str]:
+        if self._formatted is None:
+            self._formatted = _format_reasons(self._raw)
+            self._raw = ()
+        return self._formatted
+
+    def __getitem__(self, index):
+        return self._strings()[index]
+
+    def __len__(self) -> int:
+        if self._formatted is None:
+            return len(self._raw)
+        return len(self._formatted)
+
+    def __iter__(self):
+        return iter(self._strings())
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (_LazyReasons, list, tuple)):
+            return self._strings() == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return repr(self._strings())
 
 
-@dataclass
 class SubschemaResult:
     """
-    Result of a subschema check with optional failure reasons.
+    Immutable result of a subschema check with optional failure reasons.
 
     Attributes:
         is_subtype: True if s1 is a subschema of s2, False otherwise.
-        reasons: List of failure reasons if is_subtype is False.
-                 Empty list if is_subtype is True.
+        reasons: Sequence of failure reasons if is_subtype is False.
+                 Empty if is_subtype is True.
 
     Example:
         >>> result = is_subschema_with_reason(s1, s2)
@@ -27,65 +98,216 @@ class SubschemaResult:
         ...         print(reason)
     """
 
-    is_subtype: bool
-    reasons: List[str] = field(default_factory=list)
+    # Written out by hand rather than with @dataclass(slots=True, frozen=True),
+    # which needs Python 3.10. Assigning to a field raises
+    # FrozenInstanceError all the same.
+    __slots__ = ("is_subtype", "reasons")
+
+    def __init__(self, is_subtype: bool, reasons: Optional[Sequence] = None):
+        object.__setattr__(self, "is_subtype", is_subtype)
+        object.__setattr__(self, "reasons", _NO_REASONS if reasons is None else reasons)
+
+    def __setattr__(self, name, value):
+        raise FrozenInstanceError("cannot assign to field %r" % name)
+
+    def __delattr__(self, name):
+        raise FrozenInstanceError("cannot delete field %r" % name)
+
+    def __repr__(self) -> str:
+        return "SubschemaResult(is_subtype=%r, reasons=%r)" % (
+            self.is_subtype,
+            self.reasons,
+        )
+
+    def __eq__(self, other) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return (self.is_subtype, self.reasons) == (other.is_subtype, other.reasons)
+
+    def __hash__(self) -> int:
+        return hash((self.is_subtype, tuple(self.reasons)))
 
     def __bool__(self) -> bool:
         """Allow using result directly in boolean context."""
         return self.is_subtype
 
+    @classmethod
+    def ok(cls) -> "SubschemaResult":
+        """Return the shared result for a successful check."""
+        return _TRUE_RESULT
+
+
+# Successful checks carry no reasons, so they all share one result. Its
+# reasons are an empty read-only view rather than a list to keep the
+# shared instance from being mutated by callers.
+_NO_REASONS = _LazyReasons(())
+_TRUE_RESULT = SubschemaResult(True)
+
+
+class _PathFrame:
+    """
+    Context manager pushing one path segment for the duration of a block.
+
+    Implemented with plain __enter__/__exit__ rather than
+    contextlib.contextmanager to keep the per-use overhead down; use it
+    through ExplainContext.path_frame().
+    """
+
+    __slots__ = ("ctx", "segment")
+
+    def __init__(self, ctx: "ExplainContext", segment: str):
+        self.ctx = ctx
+        self.segment = segment
+
+    def __enter__(self) -> "ExplainContext":
+        self.ctx.push_path(self.segment)
+        return self.ctx
+
+    def __exit__(self, *exc_info) -> None:
+        self.ctx.pop_path()
+
 
 class ExplainContext:
     """
-    Thread-local context for collecting failure reasons during subschema checks.
+    Context-local store for collecting failure reasons during subschema checks.
 
-    This uses a thread-local storage pattern to avoid modifying existing method
-    signatures while still collecting failure information.
+    The current context is kept in a ContextVar, which avoids modifying existing
+    method signatures while still collecting failure information, and keeps
+    concurrent checks in separate threads or asyncio tasks isolated.
 
     Usage:
-        ctx = ExplainContext()
-        ExplainContext.set_current(ctx)
+        ctx = ExplainContext.acquire()
+        token = ExplainContext.set_current(ctx)
         try:
             # ... perform subschema check ...
             result = s1.isSubtype(s2)
+            # Access collected reasons
+            for reason in ctx.reasons:
+                print(reason)
         finally:
-            ExplainContext.set_current(None)
+            ExplainContext.reset_current(token)
+            ExplainContext.release(ctx)
+
+    A released context is reset and may be handed out again by acquire(),
+    so keep reasons_view() instead of the context itself to read the
+    reasons after release().
 
-        # Access collected reasons
-        for reason in ctx.reasons:
-            print(reason)
+    Path segments are scoped with path_frame():
+        with ctx.path_frame("properties/name"):
+            ...
     """
 
-    _local = threading.local()
+    __slots__ = ("_raw", "_formatted", "path", "_path_str", "_path_stack")
+
+    _ctxvar: "ContextVar[Optional[ExplainContext]]" = ContextVar(
+        "explain_ctx", default=None
+    )
 
     @classmethod
-    def get_current(cls) -> Optional["ExplainContext"]:
-        """Get the current thread's ExplainContext, or None if not set."""
-        return getattr(cls._local, "context", None)
+    def get_current(cls) -> "ExplainContext":
+        """
+        Get the current ExplainContext.
+
+        When no context is set, a shared no-op context is returned whose
+        methods discard everything, so callers never need a None check.
+        """
+        return cls._ctxvar.get() or _NOOP
 
     @classmethod
-    def set_current(cls, ctx: Optional["ExplainContext"]) -> None:
-        """Set the current thread's ExplainContext."""
-        cls._local.context = ctx
+    def is_active(cls) -> bool:
+        """Return True if a real (not no-op) context is currently set."""
+        return cls._ctxvar.get() is not None
+
+    @classmethod
+    def set_current(cls, ctx: Optional["ExplainContext"]) -> Token:
+        """
+        Set the current ExplainContext.
+
+        Returns a token that can be passed to reset_current() to restore
+        the previously active context.
+        """
+        return cls._ctxvar.set(ctx)
+
+    @classmethod
+    def reset_current(cls, token: Token) -> None:
+        """Restore the ExplainContext that was active before set_current()."""
+        cls._ctxvar.reset(token)
+
+    @classmethod
+    def acquire(cls) -> "ExplainContext":
+        """Return an empty context, reusing a released one if available."""
+        try:
+            return _POOL.pop()
+        except IndexError:
+            return cls()
+
+    @classmethod
+    def release(cls, ctx: "ExplainContext") -> None:
+        """Reset ctx and keep it for a later acquire()."""
+        if len(_POOL) < _POOL_SIZE:
+            ctx.reset()
+            _POOL.append(ctx)
 
     def __init__(self):
         """Initialize an empty explain context."""
-        self.reasons: List[str] = []
+        # Reasons are kept as (code, message, path) tuples and only turned
+        # into strings when self.reasons is read, so checks that never look
+        # at their reasons don't pay for formatting them.
+        # Raw reasons use None for both code and path.
+        self._raw: List[_Reason] = []
+        self._formatted: Optional[List[str]] = None
         self.path: List[str] = []
+        # The joined form of self.path, maintained by push_path/pop_path
+        # so that recording a reason does not re-join the whole path.
+        # _path_stack holds the length of _path_str before each push.
+        self._path_str = "/"
+        self._path_stack: List[int] = []
+
+    def reset(self) -> None:
+        """Drop all collected reasons and path segments."""
+        self._raw.clear()
+        self._formatted = None
+        self.path.clear()
+        self._path_str = "/"
+        self._path_stack.clear()
+
+    @property
+    def reasons(self) -> List[str]:
+        """The collected failure reasons as human-readable strings."""
+        if self._formatted is None:
+            self._formatted = _format_reasons(self._raw)
+        return self._formatted
+
+    def reasons_view(self) -> _LazyReasons:
+        """
+        Snapshot of the reasons collected so far as a lazily formatted,
+        read-only sequence.
+        """
+        return _LazyReasons(tuple(self._raw))
 
     def push_path(self, segment: str) -> None:
         """Push a path segment onto the current path stack."""
         self.path.append(segment)
+        self._path_stack.append(len(self._path_str))
+        if self._path_str == "/":
+            self._path_str = "/" + segment
+        else:
+            self._path_str += "/" + segment
 
     def pop_path(self) -> Optional[str]:
         """Pop the last path segment from the path stack."""
         if self.path:
+            self._path_str = self._path_str[: self._path_stack.pop()]
             return self.path.pop()
         return None
 
+    def path_frame(self, segment: str) -> _PathFrame:
+        """Return a context manager that pushes segment while it is active."""
+        return _PathFrame(self, segment)
+
     def get_path_str(self) -> str:
         """Get the current path as a string."""
-        return "/" + "/".join(self.path) if self.path else "/"
+        return self._path_str
 
     def add_reason(self, code: str, message: str) -> None:
         """
@@ -95,8 +317,22 @@ class ExplainContext:
             code: Short identifier for the failure type (e.g., "num__01")
             message: Human-readable description of the failure
         """
-        path_str = self.get_path_str()
-        self.reasons.append(f"[{code}] {message} (at {path_str})")
+        self._raw.append((code, message, self._path_str))
+        self._formatted = None
+
+    def add_debug_reason(self, *args) -> None:
+        """
+        Add a failure reason from print_db() style arguments.
+
+        The first argument is used as the code and the remaining ones are
+        joined into the message. Converting them to strings is left until
+        the reasons are read, which most checks never do.
+        """
+        if args:
+            self._raw.append((args[0], args[1:], self._path_str))
+        else:
+            self._raw.append(("unknown", (), self._path_str))
+        self._formatted = None
 
     def add_reason_raw(self, message: str) -> None:
         """
@@ -105,4 +341,45 @@ class ExplainContext:
         Args:
             message: The raw failure message
         """
-        self.reasons.append(message)
+        self._raw.append((None, message, None))
+        self._formatted = None
+
+
+class _NoopExplainContext(ExplainContext):
+    """
+    ExplainContext used when explanations are disabled.
+
+    Every method is a no-op, which lets hot code paths record reasons
+    unconditionally instead of checking for an active context first.
+    """
+
+    __slots__ = ()
+
+    def push_path(self, segment: str) -> None:
+        return None
+
+    def pop_path(self) -> Optional[str]:
+        return None
+
+    def path_frame(self, segment: str) -> _PathFrame:
+        return _NOOP_FRAME
+
+    def get_path_str(self) -> str:
+        return "/"
+
+    def add_reason(self, code: str, message: str) -> None:
+        return None
+
+    def add_debug_reason(self, *args) -> None:
+        return None
+
+    def add_reason_raw(self, message: str) -> None:
+        return None
+
+
+# Contexts returned through ExplainContext.release().
+_POOL: List[ExplainContext] = []
+_POOL_SIZE = 8
+
+_NOOP = _NoopExplainContext()
+_NOOP_FRAME = _PathFrame(_NOOP, "")
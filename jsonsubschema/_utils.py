@@ -18,6 +18,7 @@ from greenery import parse
 
 import jsonsubschema.config as config
 import jsonsubschema._constants as definitions
+from jsonsubschema._explain import ExplainContext
 
 
 def is_str(i):
@@ -71,25 +72,78 @@ def is_dict(i):
 
 
 def validate_schema(s):
-    return config.VALIDATOR.check_schema(s)
+    # Bare types like {"type": "string"} are valid in every draft.
+    # Numeric checkers are built by the thousand while joining and
+    # meeting ranges, and their schemas are simple enough to check
+    # directly, without even serializing them.
+    if is_bare_type_schema(s) \
+            or config.VALIDATOR is jsonschema.Draft4Validator and is_plain_numeric_schema(s):
+        return
+    # The same (sub)schemas get meta-validated over and over during
+    # canonicalization and while building checkers, so remember the
+    # ones that passed, keyed on their canonical JSON text.
+    try:
+        frozen = json.dumps(s, sort_keys=True)
+    except (TypeError, ValueError):
+        return config.VALIDATOR.check_schema(s)
+    _validate_frozen_schema(frozen, config.VALIDATOR)
+
+
+def is_bare_type_schema(s):
+    ''' Is s nothing but a single json type, like {"type": "string"}? '''
+    return is_dict(s) and len(s) == 1 and is_str(s.get("type")) \
+        and s["type"] in definitions.Jtypes
+
+
+_plain_numeric_keys = frozenset(["type", "minimum", "maximum", "multipleOf",
+                                 "exclusiveMinimum", "exclusiveMaximum"])
+
+
+def is_plain_numeric_schema(s):
+    ''' Is s an integer or number schema with nothing but valid range
+        and multipleOf keywords, according to the draft 4 metaschema?
+        False means 'not known' rather than invalid. '''
+    if not is_dict(s) or not s.keys() <= _plain_numeric_keys \
+            or s.get("type") not in ("integer", "number"):
+        return False
+    for k in "minimum", "maximum":
+        if k in s and not is_num(s[k]):
+            return False
+    for k, dep in ("exclusiveMinimum", "minimum"), ("exclusiveMaximum", "maximum"):
+        if k in s and not (is_bool(s[k]) and dep in s):
+            return False
+    if "multipleOf" in s and not (is_num(s["multipleOf"]) and s["multipleOf"] > 0):
+        return False
+    return True
+
+
+@functools.lru_cache(maxsize=4096)
+def _validate_frozen_schema(frozen, validator):
+    # Raises for invalid schemas, which are therefore never cached.
+    validator.check_schema(json.loads(frozen))
 
 
 def get_valid_enum_vals(enum, s):
-    # copy eum into set for two reasons:
-    # 1- we need to modify a different copy from what we iterate on
-    # 2- hashing elements into set and back to list will guarantee
-    # the list is ordered and hence JSONschema __eq__ with enums should work.
-    vals = copy.deepcopy(enum)
-    for i in enum:
-        try:
-            jsonschema.validate(instance=i, schema=s)
-        except jsonschema.ValidationError:
-            vals.remove(i)
-    # try:
-    #     return sorted(vals)
-    # except TypeError:
-    # return list(vals)
-    return vals
+    # Validate all values with a single validator; jsonschema.validate()
+    # would check the schema itself and build a new validator per value.
+    cls = jsonschema.validators.validator_for(s)
+    cls.check_schema(s)
+    validator = cls(s)
+    # Keep copies of the valid values in their original order, so the
+    # result can be modified independently of enum. Filtering rather than
+    # removing the invalid values also keeps values like 1 and True
+    # apart, which compare equal in Python.
+    return [copy.deepcopy(i) for i in enum if validator.is_valid(i)]
+
+
+def enum_key_set(enum):
+    ''' Hashable set view of enum values, or None if some value is not
+        hashable. Booleans are tagged so that True and 1 stay distinct,
+        as they are in json schema. '''
+    try:
+        return frozenset((isinstance(i, bool), i) for i in enum)
+    except TypeError:
+        return None
 
 
 def get_typed_enum_vals(enum, t):
@@ -109,13 +163,8 @@ def print_db(*args):
         else:
             print()
 
-    from jsonsubschema._explain import ExplainContext
-
-    ctx = ExplainContext.get_current()
-    if ctx and args:
-        code = str(args[0]) if args else "unknown"
-        message = " ".join(str(a) for a in args[1:]) if len(args) > 1 else ""
-        ctx.add_reason(code, message)
+    if args:
+        ExplainContext.get_current().add_debug_reason(*args)
 
 
 # def one(iterable):
@@ -138,13 +187,15 @@ def _cached_parse(pattern):
     return parse(pattern)
 
 
+@functools.lru_cache(maxsize=2048)
 def prepare_pattern_for_greenry(s):
     """The greenery library we use for regex intersection assumes
     patterns are unanchored by default. Anchoring chars ^ and $ are
     treated as literals by greenery.
     So basically strip any non-escaped ^ and $ when using greenery.
     Moreover, for any escaped ^ or $, we remove the \ to adhere to
-    greenery syntax (when they are escaped, they are literals)."""
+    greenery syntax (when they are escaped, they are literals).
+    Results are cached since the same patterns are prepared over and over."""
 
     s = re.sub(
         r"(?<!\\|\[)((?:\\{2})*)\^", r"\g<1>", s
@@ -156,6 +207,7 @@ def prepare_pattern_for_greenry(s):
     return s
 
 
+@functools.lru_cache(maxsize=2048)
 def regex_unanchor(p):
     # We need this cuz JSON regexs are not anchored by default
     # while the regex library we use assumes the opposite:
@@ -175,17 +227,59 @@ def regex_unanchor(p):
     return p
 
 
+@functools.lru_cache(maxsize=1024)
+def _cached_fsm(pattern):
+    """Cache the FSM of a pattern — greenery's Pattern.matches() rebuilds
+    it on every call."""
+    return _cached_parse(pattern).to_fsm()
+
+
+@functools.lru_cache(maxsize=1024)
+def regex_literal_prefix(regex):
+    """The literal string every match of regex starts with, read off its
+    FSM: follow the initial states that have a single live transition,
+    on a single character. '' if matches can start differently."""
+    fsm = _cached_fsm(regex)
+    state = fsm.initial
+    prefix = []
+    seen = set()
+    while state not in fsm.finals and state not in seen:
+        seen.add(state)
+        live = [(c, t) for c, t in fsm.map[state].items() if fsm.islive(t)]
+        if len(live) != 1:
+            break
+        c, state = live[0]
+        if c.negated or c.num_chars() != 1:
+            break
+        prefix.extend(c.get_chars())
+    return "".join(prefix)
+
+
+@functools.lru_cache(maxsize=4096)
 def regex_matches_string(regex=None, s=None):
+    """Match s against regex's FSM, which is a DFA and so runs in time
+    linear in len(s). The object checks ask about the same (pattern,
+    property name) pairs over and over, so results are cached too.
+    Names that don't start with the pattern's literal prefix, as with
+    most names against patterns like ^x-, are rejected without walking
+    the FSM, which scans the FSM's alphabet for every character."""
     if regex:
-        return _cached_parse(regex).matches(s)
+        return s.startswith(regex_literal_prefix(regex)) \
+            and _cached_fsm(regex).accepts(s)
     else:
         return True
 
 
+@functools.lru_cache(maxsize=2048)
 def regex_meet(s1, s2):
+    """The intersection is built with greenery's pattern algebra, which
+    is slow, so results are cached. Disjoint patterns are told apart on
+    their cached FSMs first, without building the intersection at all."""
     if s1 and s2:
+        if (_cached_fsm(s1) & _cached_fsm(s2)).empty():
+            return None
         ret = _cached_parse(s1) & _cached_parse(s2)
-        return str(ret.reduce()) if not ret.empty() else None
+        return str(ret.reduce())
     elif s1:
         return s1
     elif s2:
@@ -194,27 +288,25 @@ def regex_meet(s1, s2):
         return None
 
 
+@functools.lru_cache(maxsize=4096)
 def regex_isSubset(s1, s2):
     """regex subset is quite expensive to compute
-    especially for complex patterns."""
+    especially for complex patterns, so results are cached."""
     if s1 and s2:
-        s1 = _cached_parse(s1).reduce()
-        s2 = _cached_parse(s2).reduce()
+        if s1 == s2:
+            return True
+        # Compare the languages on the (deterministic) FSMs directly:
+        # going through greenery's pattern algebra instead, e.g.
+        # s1 & s2.everythingbut(), converts every intermediate FSM back
+        # into a pattern, which is orders of magnitude slower.
         try:
-            s1.cardinality()
-            s2.cardinality()
-            return set(s1.strings()).issubset(s2.strings())
-        except (OverflowError, Exception):
-            # catching a general exception thrown from greenery
-            # see https://github.com/qntm/greenery/blob/master/greenery/lego.py
-            # ... raise Exception("Please choose an 'otherchar'")
-            return s1.equivalent(s2) or (s1 & s2.everythingbut()).empty()
+            return _cached_fsm(s1).issubset(_cached_fsm(s2))
         except Exception as e:
             exit_with_msg("regex failure from greenry", e)
     elif s1:
         return True
     elif s2:
-        return _cached_parse(s2).equivalent(_cached_parse(".*"))
+        return _cached_fsm(s2).equivalent(_cached_fsm(".*"))
 
 
 # def regex_isProperSubset(s1, s2):
@@ -242,6 +334,7 @@ def string_range_to_regex(min, max):
     return pattern
 
 
+@functools.lru_cache(maxsize=1024)
 def complement_of_string_pattern(s):
     return str(_cached_parse(s).everythingbut().reduce())
 
@@ -345,14 +438,17 @@ def generate_range_with_multipleof(range_, pos, neg):
 
 def get_new_min_max_with_mulof(mn, mx, mulof):
     #
-    # At the moment, this is part of an enumerative solution
-    # for multipleOf integer.
-    # Is there a more efficient way to find, for  x <= n <= y,
-    # what is the smallest x_min > x s.t. x_min % f = 0
-    # and the largest y_max < y s.t. x_max % f = 0
-    # for some factor f.
+    # For x <= n <= y, find the smallest x_min >= x s.t. x_min % f = 0
+    # and the largest y_max <= y s.t. y_max % f = 0 for some factor f.
+    # With an integer factor, both have a closed form; otherwise this
+    # is part of an enumerative solution for multipleOf integer.
     #
-    if is_num(mulof) and mulof < mx:
+    if is_int(mulof) and mulof < mx:
+        if is_num(mn):
+            mn = mn + (-mn) % mulof
+        if is_num(mx):
+            mx = mx - mx % mulof
+    elif is_num(mulof) and mulof < mx:
         if is_num(mn):
             while mn % mulof != 0:
                 mn = mn + 1
@@ -10,46 +10,104 @@ from jsonsubschema._canonicalization import (
     canonicalize_schema,
     simplify_schema_and_embed_checkers,
 )
+from jsonsubschema._cache import interned, leaf_interning, memoize_schema_pair
+from jsonsubschema._checkers import is_same_schema, subtype_memo
+from jsonsubschema._explain import ExplainContext
 from jsonsubschema._utils import validate_schema, print_db
 
 from jsonsubschema.exceptions import UnsupportedRecursiveRef
 
 
-def prepare_operands(s1, s2):
+def _has_ref(s):
+    """Does any dict inside s have a $ref key?"""
+    todo = [s]
+    while todo:
+        i = todo.pop()
+        if isinstance(i, dict):
+            if "$ref" in i:
+                return True
+            todo.extend(i.values())
+        elif isinstance(i, list):
+            todo.extend(i)
+    return False
+
+
+def _prepare_operand(s, side):
     # First, we load schemas using jsonref to resolve $ref
     # before starting canonicalization.
 
-    # s1 = jsonref.loads(json.dumps(s1))
-    # s2 = jsonref.loads(json.dumps(s2))
+    # s = jsonref.loads(json.dumps(s))
     # This is not very efficient, should be done lazily maybe?
-    s1 = jsonref.JsonRef.replace_refs(s1)
-    s2 = jsonref.JsonRef.replace_refs(s2)
+    # jsonref rebuilds every dict and list of the schema, so skip it
+    # for the many schemas without any $ref.
+    if _has_ref(s):
+        s = jsonref.JsonRef.replace_refs(s)
 
-    # Canonicalize and embed checkers for both lhs
-    # and rhs schemas  before starting the subtype checking.
+    # Canonicalize and embed checkers before starting the subtype checking.
     # This also validates input schemas and canonicalized schemas.
 
     # At the moment, recursive/circual refs are not supported and hence, canonicalization
     # throws a RecursionError.
     try:
-        _s1 = simplify_schema_and_embed_checkers(canonicalize_schema(s1))
+        return simplify_schema_and_embed_checkers(canonicalize_schema(s))
     except RecursionError:
         # avoid cluttering output by unchaining the recursion error
-        raise UnsupportedRecursiveRef(s1, "LHS") from None
+        raise UnsupportedRecursiveRef(s, side) from None
+
+
+def prepare_operands(s1, s2):
+    return _prepare_operand(s1, "LHS"), _prepare_operand(s2, "RHS")
+
+
+def _prepare_subtype_operands(s1, s2):
+    # Subtype checking doesn't modify its operands, so structurally
+    # identical schemas, and identical leaves within them, can share a
+    # single simplified object.
+    with leaf_interning():
+        return (interned(s1, lambda s: _prepare_operand(s, "LHS")),
+                interned(s2, lambda s: _prepare_operand(s, "RHS")))
 
-    try:
-        _s2 = simplify_schema_and_embed_checkers(canonicalize_schema(s2))
-    except RecursionError:
-        # avoid cluttering output by unchaining the recursion error
-        raise UnsupportedRecursiveRef(s2, "RHS") from None
 
-    return _s1, _s2
+def canonicalize(s):
+    """Canonicalize a schema once for repeated use with isSubschemaCanonical().
 
+    Unlike canonicalizeSchema(), which returns the canonical JSON document,
+    this returns the simplified checker object that subtype checks run on.
+    """
+    return _prepare_operand(s, "Schema")
+
+
+def isSubschemaCanonical(c1, c2):
+    """Subtype check on two schemas returned by canonicalize()."""
+    with subtype_memo():
+        return is_same_schema(c1, c2) or c1.isSubtype(c2)
 
+
+@memoize_schema_pair()
 def isSubschema(s1, s2):
     """Entry point for schema subtype checking."""
-    s1, s2 = prepare_operands(s1, s2)
-    return s1.isSubtype(s2)
+    return isSubschemaCanonical(*_prepare_subtype_operands(s1, s2))
+
+
+@memoize_schema_pair()
+def isSubschemaBoth(s1, s2):
+    """Subtype checks in both directions, as (s1 <: s2, s2 <: s1).
+
+    Both schemas are canonicalized once, and the two checks share one
+    memo of sub-schema results.
+    """
+    c1, c2 = _prepare_subtype_operands(s1, s2)
+    with subtype_memo():
+        if is_same_schema(c1, c2):
+            return True, True
+        return bool(c1.isSubtype(c2)), bool(c2.isSubtype(c1))
+
+
+def clear_cache():
+    """Drop all cached subschema check results."""
+    isSubschema.cache_clear()
+    isSubschemaBoth.cache_clear()
+    is_subschema_with_reason.cache_clear()
 
 
 def meet(s1, s2):
@@ -110,6 +168,7 @@ def schemaDiff(s1, s2):
         return "breaking"
 
 
+@memoize_schema_pair()
 def is_subschema_with_reason(s1, s2):
     """
     Check if s1 is a subschema of s2, with detailed failure reasons.
@@ -118,15 +177,14 @@ def is_subschema_with_reason(s1, s2):
     - is_subtype: bool indicating if s1 <: s2
     - reasons: list of failure reasons if is_subtype is False
     """
-    from jsonsubschema._explain import ExplainContext, SubschemaResult
+    from jsonsubschema._explain import SubschemaResult
 
-    ctx = ExplainContext()
-    ExplainContext.set_current(ctx)
+    ctx = ExplainContext.acquire()
+    token = ExplainContext.set_current(ctx)
     try:
-        _s1, _s2 = prepare_operands(s1, s2)
-        result = _s1.isSubtype(_s2)
-        return SubschemaResult(
-            is_subtype=result, reasons=ctx.reasons if not result else []
-        )
+        if isSubschemaCanonical(*_prepare_subtype_operands(s1, s2)):
+            return SubschemaResult.ok()
+        return SubschemaResult(is_subtype=False, reasons=ctx.reasons_view())
     finally:
-        ExplainContext.set_current(None)
+        ExplainContext.reset_current(token)
+        ExplainContext.release(ctx)
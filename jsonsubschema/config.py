@@ -3,6 +3,7 @@ Created on June 24, 2019
 @author: Andrew Habib
 '''
 
+import os
 import sys
 import jsonschema
 
@@ -11,6 +12,8 @@ this = sys.modules[__name__]
 this.VALIDATOR = jsonschema.Draft4Validator     # Which schema validator draft to use
 this.PRINT_DB = False                           # Print debugging info?
 this.WARN_UNINHABITED = False                   # Enable uninhabited types warning?
+this.PARALLEL_BRANCHES = int(os.environ.get(    # Min. number of anyOf branches to
+    "JSONSUBSCHEMA_PARALLEL_BRANCHES", 0))      # check in parallel, 0 to disable
 
 
 # API to set which schema validator draft to use
@@ -36,3 +39,12 @@ def set_warn_uninhabited(b=False):
         this.WARN_UNINHABITED = True
     else:
         this.WARN_UNINHABITED = False
+
+
+# API to check the branches of large anyOf schemas in parallel?
+def set_parallel_branches(n=0):
+    ''' Subtype checks of anyOf schemas with at least n branches spread
+        the branches over a thread pool. This only pays off on Python
+        builds without a GIL; n = 0 disables it. '''
+
+    this.PARALLEL_BRANCHES = n
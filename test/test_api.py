@@ -4,9 +4,11 @@ Created on August 9, 2019
 '''
 
 import json
+import jsonschema
 import unittest
 
 import jsonsubschema._checkers as c
+from jsonsubschema._cache import leaf_interning
 from jsonsubschema import *
 from jsonsubschema._canonicalization import *
 
@@ -86,6 +88,113 @@ class TestAPI(unittest.TestCase):
             self.assertFalse(isSubschema(
                 joinSchemas(s1, s2), meetSchemas(s2, s1)))
 
+    def test_api_isSubschema_cached(self):
+
+        clear_cache()
+        s = {"type": "string", "pattern": "^a+$"}
+
+        with self.subTest():
+            self.assertTrue(isSubschema(s, {"type": "string"}))
+
+        with self.subTest():
+            self.assertTrue(isSubschema(dict(s), {"type": "string"}))
+
+        with self.subTest():
+            self.assertFalse(isSubschema({"type": "string"}, s))
+
+        with self.subTest():
+            self.assertTrue(is_subschema_with_reason(s, {"type": "string"}))
+
+        with self.subTest():
+            self.assertFalse(is_subschema_with_reason({"type": "string"}, s))
+
+        with self.subTest():
+            self.assertEqual(is_subschema_with_reason({"type": "string"}, s),
+                             is_subschema_with_reason({"type": "string"}, s))
+
+        # Equal in Python, but not in JSON schema.
+        with self.subTest():
+            self.assertTrue(isSubschema({"enum": [1]}, {"enum": [1]}))
+
+        with self.subTest():
+            self.assertFalse(isSubschema({"enum": [True]}, {"enum": [1]}))
+
+    def test_api_isSubschemaBoth(self):
+
+        with self.subTest():
+            self.assertEqual(isSubschemaBoth(s1, s2), (False, True))
+
+        with self.subTest():
+            self.assertEqual(isSubschemaBoth(s2, s2), (True, True))
+
+        with self.subTest():
+            self.assertEqual(isSubschemaBoth({"type": "string"}, s1),
+                             (False, False))
+
+    def test_api_leaves_interned(self):
+
+        s = {"type": "object",
+             "properties": {"a": {"type": "string"}, "b": {"type": "string"}}}
+        with leaf_interning():
+            lhs = simplify_schema_and_embed_checkers(canonicalizeSchema(s))
+        props = lhs.properties
+
+        with self.subTest():
+            self.assertIs(props["a"], props["b"])
+
+        # Outside of subtype checks, leaves are still built separately.
+        props = simplify_schema_and_embed_checkers(
+            canonicalizeSchema(s)).properties
+        with self.subTest():
+            self.assertIsNot(props["a"], props["b"])
+
+        with self.subTest():
+            self.assertTrue(isSubschema(s, s))
+
+    def test_api_repeated_properties_canonicalized_once(self):
+
+        s = {"type": "object",
+             "properties": {"a": {"const": 1}, "b": {"const": True},
+                            "c": {"const": 1}}}
+        props = canonicalizeSchema(s)["properties"]
+
+        with self.subTest():
+            self.assertEqual(props["a"], props["c"])
+
+        with self.subTest():
+            self.assertIsNot(props["a"], props["c"])
+
+        with self.subTest():
+            self.assertNotEqual(props["a"], props["b"])
+
+    def test_api_operands_not_modified(self):
+
+        s = {"type": "object",
+             "properties": {"a": {"type": "string"},
+                            "b": {"type": ["integer", "null"]}},
+             "items": {"type": "string"}}
+        before = json.dumps(s, sort_keys=True)
+
+        with self.subTest():
+            self.assertTrue(isSubschema(s, s))
+
+        meetSchemas(s, s)
+        joinSchemas(s, s)
+
+        with self.subTest():
+            self.assertEqual(json.dumps(s, sort_keys=True), before)
+
+    def test_api_invalid_schema_not_cached(self):
+
+        valid = {"type": "number", "multipleOf": 0.5}
+        invalid = {"type": "number", "multipleOf": -0.5}
+        self.assertTrue(isSubschema(valid, valid))
+
+        for _ in range(2):
+            with self.subTest():
+                self.assertRaises(jsonschema.SchemaError,
+                                  isSubschema, valid, invalid)
+
     def test_api_meet(self):
 
         with self.subTest():
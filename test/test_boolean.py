@@ -5,7 +5,7 @@ Created on June 3, 2019
 
 import unittest
 
-from jsonsubschema import isSubschema
+from jsonsubschema import canonicalizeSchema, isSubschema
 
 
 class TestSingletonBooleans(unittest.TestCase):
@@ -37,6 +37,17 @@ class TestSingletonBooleans(unittest.TestCase):
         with self.subTest():
             self.assertTrue(isSubschema(s2, s1))
 
+    def test_nested_single_branch(self):
+        s1 = {'anyOf': [{'allOf': [{'anyOf': [{'type': 'string'}]}]}]}
+        s2 = {'type': 'string'}
+
+        with self.subTest('Peeled'):
+            self.assertEqual(canonicalizeSchema(s1), canonicalizeSchema(s2))
+        with self.subTest():
+            self.assertTrue(isSubschema(s1, s2))
+        with self.subTest():
+            self.assertTrue(isSubschema(s2, s1))
+
     def test_allOf_oneOf(self):
         s1 = {'allOf': [{'type': 'string'}]}
         s2 = {'oneOf': [{'type': 'string'}]}
@@ -88,6 +99,35 @@ class TestOneOf(unittest.TestCase):
         with self.subTest('LHS > RHS'):
             self.assertTrue(isSubschema(s2, s1))
 
+    def test_oneOf_ranges(self):
+        # accepts 0..9 and 21..30 only
+        s1 = {'oneOf': [{'type': 'integer', 'minimum': 0, 'maximum': 20},
+                        {'type': 'integer', 'minimum': 10, 'maximum': 30}]}
+        s2 = {'anyOf': [{'type': 'integer', 'minimum': 0, 'maximum': 9},
+                        {'type': 'integer', 'minimum': 21, 'maximum': 30}]}
+
+        with self.subTest('LHS < RHS'):
+            self.assertTrue(isSubschema(s1, s2))
+        with self.subTest('LHS > RHS'):
+            self.assertTrue(isSubschema(s2, s1))
+
+    def test_oneOf_touching_ranges(self):
+        # the shared endpoint 1 is excluded
+        s1 = {'oneOf': [{'type': 'number', 'maximum': 1},
+                        {'type': 'number', 'minimum': 1}]}
+        s2 = {'anyOf': [{'type': 'number', 'maximum': 1,
+                         'exclusiveMaximum': True},
+                        {'type': 'number', 'minimum': 1,
+                         'exclusiveMinimum': True}]}
+
+        with self.subTest('LHS < RHS'):
+            self.assertTrue(isSubschema(s1, s2))
+        with self.subTest('LHS > RHS'):
+            self.assertTrue(isSubschema(s2, s1))
+        with self.subTest():
+            self.assertFalse(isSubschema({'type': 'number', 'minimum': 1,
+                                          'maximum': 1}, s1))
+
     def test_oneOf6(self):
         # accepts 3 only
         s1 = {'oneOf': [{'enum': [1, 2, 3]}, {'enum': [1, 2]}]}
@@ -120,6 +160,45 @@ class TestAllOf(unittest.TestCase):
         with self.subTest('LHS > RHS'):
             self.assertTrue(isSubschema(s2, s1))
 
+    def test_nested_allOf(self):
+        s1 = {'type': 'integer', 'minimum': 3}
+        s2 = s1
+        for _ in range(10):
+            s2 = {'allOf': [s2]}
+
+        with self.subTest('Flattened'):
+            self.assertEqual(canonicalizeSchema(s2), canonicalizeSchema(s1))
+        with self.subTest('LHS < RHS'):
+            self.assertTrue(isSubschema(s1, s2))
+        with self.subTest('LHS > RHS'):
+            self.assertTrue(isSubschema(s2, s1))
+
+    def test_nested_allOf_spliced(self):
+        s1 = {'allOf': [{'allOf': [{'minimum': 10}, {'maximum': 20}]},
+                        {'type': 'integer'}]}
+        s2 = {'type': 'integer', 'minimum': 10, 'maximum': 20}
+
+        with self.subTest('LHS < RHS'):
+            self.assertTrue(isSubschema(s1, s2))
+        with self.subTest('LHS > RHS'):
+            self.assertTrue(isSubschema(s2, s1))
+
+
+class TestAnyOf(unittest.TestCase):
+
+    def test_nested_anyOf_spliced(self):
+        s1 = {'anyOf': [{'anyOf': [{'type': 'string'}, {'type': 'null'}]},
+                        {'type': 'boolean'}]}
+        s2 = {'anyOf': [{'type': 'string'}, {'type': 'null'},
+                        {'type': 'boolean'}]}
+
+        with self.subTest('Flattened'):
+            self.assertEqual(canonicalizeSchema(s1), canonicalizeSchema(s2))
+        with self.subTest('LHS < RHS'):
+            self.assertTrue(isSubschema(s1, s2))
+        with self.subTest('LHS > RHS'):
+            self.assertTrue(isSubschema(s2, s1))
+
 
 class TestNotBoolean(unittest.TestCase):
 
@@ -202,6 +281,29 @@ class TestNotBoolean(unittest.TestCase):
         with self.subTest('LHS > RHS'):
             self.assertTrue(isSubschema(s2, s1))
 
+    def test_not_not_enum(self):
+        s1 = {'not': {'not': {'enum': ['a']}}}
+        s2 = {}
+
+        with self.subTest('LHS = LHS'):
+            self.assertTrue(isSubschema(s1, s1))
+        with self.subTest('LHS < RHS'):
+            self.assertTrue(isSubschema(s1, s2))
+        with self.subTest('LHS > RHS'):
+            self.assertFalse(isSubschema(s2, s1))
+
+    def test_oneOf_not_not_enum(self):
+        s1 = {'oneOf': [{'type': 'string'},
+                        {'not': {'not': {'enum': [True]}}}]}
+        s2 = {}
+
+        with self.subTest('LHS = LHS'):
+            self.assertTrue(isSubschema(s1, s1))
+        with self.subTest('LHS < RHS'):
+            self.assertTrue(isSubschema(s1, s2))
+        with self.subTest('LHS > RHS'):
+            self.assertFalse(isSubschema(s2, s1))
+
 
 class TestNotBooleans(unittest.TestCase):
 
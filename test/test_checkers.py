@@ -1,5 +1,17 @@
+import copy
+
+import jsonsubschema.config as config
 from jsonsubschema._canonicalization import simplify_schema_and_embed_checkers
-from jsonsubschema._checkers import JSONbot, JSONtop, is_bot, is_top
+from jsonsubschema._checkers import (
+    JSONanyOf,
+    JSONbot,
+    JSONtop,
+    _type_bits,
+    is_bot,
+    is_same_schema,
+    is_top,
+    subtype_memo,
+)
 import unittest
 
 
@@ -33,3 +45,103 @@ class TestIsBot(unittest.TestCase):
 
     def test_zero_is_not_bot(self) -> None:
         self.assertFalse(is_bot(0))
+
+
+class TestIsSameSchema(unittest.TestCase):
+    def test_equal_schemas_are_same(self) -> None:
+        s1 = simplify_schema_and_embed_checkers({"type": "integer", "minimum": 2})
+        s2 = simplify_schema_and_embed_checkers({"type": "integer", "minimum": 2})
+        self.assertTrue(is_same_schema(s1, s2))
+
+    def test_different_schemas_are_not_same(self) -> None:
+        s1 = simplify_schema_and_embed_checkers({"type": "integer", "minimum": 2})
+        s2 = simplify_schema_and_embed_checkers({"type": "integer", "minimum": 3})
+        self.assertFalse(is_same_schema(s1, s2))
+
+    def test_different_types_are_not_same(self) -> None:
+        self.assertFalse(is_same_schema(JSONtop(), {}))
+
+
+class TestDeepcopy(unittest.TestCase):
+    def test_deepcopy_array(self) -> None:
+        s = simplify_schema_and_embed_checkers({"type": "array", "items": {"type": "string", "maxLength": 3}})
+        c = copy.deepcopy(s)
+        self.assertIsNot(c, s)
+        self.assertIsNot(c.items_, s.items_)
+        self.assertEqual(c, s)
+        self.assertTrue(c.isSubtype(s))
+        self.assertTrue(s.isSubtype(c))
+
+
+class TestSubtypeMemo(unittest.TestCase):
+    def test_memo_gives_same_results(self) -> None:
+        s1 = simplify_schema_and_embed_checkers({"type": "integer", "minimum": 2})
+        s2 = simplify_schema_and_embed_checkers({"type": "integer", "minimum": 1})
+        with subtype_memo():
+            for _ in range(2):
+                self.assertTrue(s1.isSubtype(s2))
+                self.assertFalse(s2.isSubtype(s1))
+        self.assertTrue(s1.isSubtype(s2))
+        self.assertFalse(s2.isSubtype(s1))
+
+    def test_memo_shares_results_of_equal_simple_schemas(self) -> None:
+        s1 = simplify_schema_and_embed_checkers({"type": "integer", "minimum": 5, "maximum": 8})
+        s2 = simplify_schema_and_embed_checkers({"type": "integer", "minimum": 1})
+        s3 = simplify_schema_and_embed_checkers({"type": "integer", "minimum": 5, "maximum": 8})
+        self.assertEqual(s1.content_key(), s3.content_key())
+        self.assertNotEqual(s1.content_key(), s2.content_key())
+        with subtype_memo():
+            self.assertTrue(s1.isSubtype(s2))
+            self.assertTrue(s3.isSubtype(s2))
+            self.assertFalse(s2.isSubtype(s3))
+
+    def test_content_key_follows_changes_to_copies(self) -> None:
+        s1 = simplify_schema_and_embed_checkers({"type": "string", "maxLength": 3})
+        s1.content_key()
+        s2 = copy.deepcopy(s1)
+        s2["maxLength"] = 5
+        self.assertNotEqual(s1.content_key(), s2.content_key())
+
+
+class TestAnyOfTypemask(unittest.TestCase):
+    def test_typemask_counts_unconstrained_branches(self) -> None:
+        s = simplify_schema_and_embed_checkers({"anyOf": [
+            {"type": "string"}, {"type": "integer", "minimum": 0}, {"type": "null"}]})
+        self.assertEqual(s.typemask, _type_bits["string"] | _type_bits["null"])
+
+    def test_unconstrained_number_covers_integer(self) -> None:
+        s1 = simplify_schema_and_embed_checkers({"type": "integer", "maximum": 5})
+        s2 = simplify_schema_and_embed_checkers({"anyOf": [
+            {"type": "string", "maxLength": 2}, {"type": "number"}]})
+        self.assertTrue(s1.isSubtype(s2))
+        self.assertFalse(s2.isSubtype(s1))
+
+
+class TestAnyOfFlatten(unittest.TestCase):
+    def test_consecutive_nested_anyOfs_are_flattened(self) -> None:
+        string, null, boolean = (simplify_schema_and_embed_checkers({"type": t})
+                                 for t in ("string", "null", "boolean"))
+        inner = JSONanyOf({"anyOf": [null, JSONanyOf({"anyOf": [boolean]})]})
+        s = JSONanyOf({"anyOf": [JSONanyOf({"anyOf": [string]}), inner]})
+        self.assertEqual(s.anyOf, [string, null, boolean])
+        self.assertIs(s["anyOf"], s.anyOf)
+
+
+class TestParallelBranches(unittest.TestCase):
+    def setUp(self) -> None:
+        self.n = config.PARALLEL_BRANCHES
+        config.set_parallel_branches(2)
+
+    def tearDown(self) -> None:
+        config.set_parallel_branches(self.n)
+
+    def test_parallel_anyOf_gives_same_results(self) -> None:
+        s1 = simplify_schema_and_embed_checkers({"anyOf": [
+            {"type": "integer", "minimum": 0, "maximum": 5},
+            {"type": "string", "maxLength": 2}, {"type": "null"}]})
+        s2 = simplify_schema_and_embed_checkers({"anyOf": [
+            {"type": "integer", "minimum": 0}, {"type": "string", "maxLength": 3},
+            {"type": "null"}, {"type": "array", "maxItems": 1}]})
+        with subtype_memo():
+            self.assertTrue(s1.isSubtype(s2))
+            self.assertFalse(s2.isSubtype(s1))
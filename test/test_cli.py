@@ -10,30 +10,66 @@ This module tests the command-line interface for jsonsubschema including:
 Created to ensure CLI interface works correctly.
 """
 
+import contextlib
+import io
 import json
 import os
 import subprocess
+import sys
 import tempfile
+import traceback
 import unittest
 
+from jsonsubschema.cli import main
+
+
+def run_cli_in_process(args):
+    """Run the CLI entry point in this interpreter and capture its output.
+
+    Returns a subprocess.CompletedProcess so tests read the same way as with
+    a real subprocess: SystemExit gives the return code and any other
+    uncaught exception is reported on stderr with return code 1.
+    """
+    stdout, stderr = io.StringIO(), io.StringIO()
+    argv = sys.argv
+    sys.argv = ["jsonsubschema"] + list(args)
+    try:
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            try:
+                main()
+                returncode = 0
+            except SystemExit as e:
+                if e.code is None:
+                    returncode = 0
+                elif isinstance(e.code, int):
+                    returncode = e.code
+                else:
+                    print(e.code, file=sys.stderr)
+                    returncode = 1
+            except Exception:
+                traceback.print_exc()
+                returncode = 1
+    finally:
+        sys.argv = argv
+    return subprocess.CompletedProcess(
+        args, returncode, stdout.getvalue(), stderr.getvalue())
+
 
 class TestCLIBasicUsage(unittest.TestCase):
     """Test basic CLI functionality."""
 
-    def setUp(self):
-        """Create temporary test files."""
-        self.temp_dir = tempfile.mkdtemp()
-        self.s1_path = os.path.join(self.temp_dir, "s1.json")
-        self.s2_path = os.path.join(self.temp_dir, "s2.json")
+    @classmethod
+    def setUpClass(cls):
+        """Create a temporary directory shared by all tests."""
+        cls._temp_dir = tempfile.TemporaryDirectory()
+        cls.temp_dir = cls._temp_dir.name
+        cls.s1_path = os.path.join(cls.temp_dir, "s1.json")
+        cls.s2_path = os.path.join(cls.temp_dir, "s2.json")
 
-    def tearDown(self):
+    @classmethod
+    def tearDownClass(cls):
         """Clean up temporary files."""
-        if os.path.exists(self.s1_path):
-            os.remove(self.s1_path)
-        if os.path.exists(self.s2_path):
-            os.remove(self.s2_path)
-        if os.path.exists(self.temp_dir):
-            os.rmdir(self.temp_dir)
+        cls._temp_dir.cleanup()
 
     def _write_schema(self, path, schema):
         """Helper to write schema to file."""
@@ -42,12 +78,7 @@ class TestCLIBasicUsage(unittest.TestCase):
 
     def _run_cli(self, lhs_path, rhs_path):
         """Helper to run CLI and capture output."""
-        result = subprocess.run(
-            ["python", "-m", "jsonsubschema.cli", lhs_path, rhs_path],
-            capture_output=True,
-            text=True,
-        )
-        return result
+        return run_cli_in_process([lhs_path, rhs_path])
 
     def test_cli_basic_true(self):
         """Test CLI with subtype relationship (returns True)."""
@@ -105,82 +136,60 @@ class TestCLIBasicUsage(unittest.TestCase):
 class TestCLIFileHandling(unittest.TestCase):
     """Test CLI file handling."""
 
-    def setUp(self):
-        """Create temporary test directory."""
-        self.temp_dir = tempfile.mkdtemp()
-        self.valid_path = os.path.join(self.temp_dir, "valid.json")
+    @classmethod
+    def setUpClass(cls):
+        """Create a temporary directory with the files shared by all tests."""
+        cls._temp_dir = tempfile.TemporaryDirectory()
+        cls.temp_dir = cls._temp_dir.name
+        cls.valid_path = os.path.join(cls.temp_dir, "valid.json")
+        cls.invalid_path = os.path.join(cls.temp_dir, "invalid.json")
+        cls.nonexistent_path = os.path.join(cls.temp_dir, "nonexistent.json")
+        with open(cls.valid_path, "w") as f:
+            json.dump({"type": "string"}, f)
+        with open(cls.invalid_path, "w") as f:
+            f.write("{invalid json")
 
-    def tearDown(self):
+    @classmethod
+    def tearDownClass(cls):
         """Clean up temporary files."""
-        if os.path.exists(self.valid_path):
-            os.remove(self.valid_path)
-        if os.path.exists(self.temp_dir):
-            os.rmdir(self.temp_dir)
-
-    def _write_schema(self, path, schema):
-        """Helper to write schema to file."""
-        with open(path, "w") as f:
-            json.dump(schema, f)
+        cls._temp_dir.cleanup()
 
     def _run_cli(self, lhs_path, rhs_path):
         """Helper to run CLI and capture output."""
-        result = subprocess.run(
-            ["python", "-m", "jsonsubschema.cli", lhs_path, rhs_path],
-            capture_output=True,
-            text=True,
-        )
-        return result
+        return run_cli_in_process([lhs_path, rhs_path])
 
     def test_cli_missing_lhs_file(self):
         """Test CLI with missing LHS file."""
-        self._write_schema(self.valid_path, {"type": "string"})
-        nonexistent = os.path.join(self.temp_dir, "nonexistent.json")
-
-        result = self._run_cli(nonexistent, self.valid_path)
+        result = self._run_cli(self.nonexistent_path, self.valid_path)
         self.assertNotEqual(result.returncode, 0)
 
     def test_cli_missing_rhs_file(self):
         """Test CLI with missing RHS file."""
-        self._write_schema(self.valid_path, {"type": "string"})
-        nonexistent = os.path.join(self.temp_dir, "nonexistent.json")
-
-        result = self._run_cli(self.valid_path, nonexistent)
+        result = self._run_cli(self.valid_path, self.nonexistent_path)
         self.assertNotEqual(result.returncode, 0)
 
     def test_cli_invalid_json_lhs(self):
         """Test CLI with invalid JSON in LHS file."""
-        invalid_path = os.path.join(self.temp_dir, "invalid.json")
-        with open(invalid_path, "w") as f:
-            f.write("{invalid json")
-
-        self._write_schema(self.valid_path, {"type": "string"})
-
-        result = self._run_cli(invalid_path, self.valid_path)
+        result = self._run_cli(self.invalid_path, self.valid_path)
         self.assertNotEqual(result.returncode, 0)
 
-        os.remove(invalid_path)
-
     def test_cli_invalid_json_rhs(self):
         """Test CLI with invalid JSON in RHS file."""
-        invalid_path = os.path.join(self.temp_dir, "invalid.json")
-        with open(invalid_path, "w") as f:
-            f.write("{invalid json")
-
-        self._write_schema(self.valid_path, {"type": "string"})
-
-        result = self._run_cli(self.valid_path, invalid_path)
+        result = self._run_cli(self.valid_path, self.invalid_path)
         self.assertNotEqual(result.returncode, 0)
 
-        os.remove(invalid_path)
-
 
 class TestCLIArguments(unittest.TestCase):
     """Test CLI argument handling."""
 
     def _run_cli(self, args):
         """Helper to run CLI with specific arguments."""
+        return run_cli_in_process(args)
+
+    def _run_cli_subprocess(self, args):
+        """Helper to run CLI as a separate process through its entry point."""
         result = subprocess.run(
-            ["python", "-m", "jsonsubschema.cli"] + args,
+            [sys.executable, "-m", "jsonsubschema.cli"] + args,
             capture_output=True,
             text=True,
         )
@@ -200,7 +209,7 @@ class TestCLIArguments(unittest.TestCase):
 
     def test_cli_help_flag(self):
         """Test CLI with help flag."""
-        result = self._run_cli(["--help"])
+        result = self._run_cli_subprocess(["--help"])
         self.assertEqual(result.returncode, 0)
         self.assertIn("usage", result.stdout.lower())
 
@@ -85,6 +85,15 @@ class TestEnum(unittest.TestCase):
         with self.subTest('LHS > RHS'):
             self.assertTrue(isSubschema(s2, s1))
 
+    def test_enum_int_and_bool(self):
+        s1 = {'type': 'integer', 'enum': [1, True]}
+        s2 = {'enum': [1]}
+
+        with self.subTest('LHS < RHS'):
+            self.assertTrue(isSubschema(s1, s2))
+        with self.subTest('LHS > RHS'):
+            self.assertTrue(isSubschema(s2, s1))
+
     def test_enum_regex_string(self):
         s1 = {'enum': ['^*']}
         s2 = {'enum': ['^^']}
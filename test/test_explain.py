@@ -1,9 +1,27 @@
 import unittest
+from dataclasses import FrozenInstanceError
 
-from jsonsubschema import is_subschema_with_reason, SubschemaResult
+from jsonsubschema import canonicalize, is_subschema_with_reason, SubschemaResult
 
 
 class TestExplainAPI(unittest.TestCase):
+    # Schemas shared by several tests below.
+    _FIXTURES = [
+        {"type": "integer"},
+        {"type": "string"},
+        {"type": ["integer", "string"]},
+        {"type": "integer", "maximum": 50},
+        {"type": "integer", "maximum": 100},
+    ]
+
+    @classmethod
+    def setUpClass(cls):
+        # Canonicalizing once up front fills the meta-validation and
+        # simplification caches, which later checks of the same
+        # schemas hit instead of redoing the work.
+        for s in cls._FIXTURES:
+            canonicalize(s)
+
     def test_subschema_returns_true_with_empty_reasons(self):
         s1 = {"type": "integer"}
         s2 = {"type": ["integer", "string"]}
@@ -37,6 +55,15 @@ class TestExplainAPI(unittest.TestCase):
         self.assertFalse(result)
         self.assertFalse(bool(result))
 
+    def test_type_mismatch_failure_captured(self):
+        s1 = {"type": "number"}
+        s2 = {"type": "string"}
+        result = is_subschema_with_reason(s1, s2)
+
+        self.assertFalse(result.is_subtype)
+        self.assertGreater(len(result.reasons), 0)
+        self.assertIn("num__", " ".join(result.reasons))
+
     def test_numeric_constraint_failure_captured(self):
         s1 = {"type": "integer", "minimum": 0, "maximum": 100}
         s2 = {"type": "integer", "minimum": 0, "maximum": 50}
@@ -79,6 +106,16 @@ class TestExplainAPI(unittest.TestCase):
         self.assertTrue(result.is_subtype)
         self.assertEqual(result.reasons, [])
 
+    def test_reasons_survive_later_checks(self):
+        result = is_subschema_with_reason({"type": "integer", "maximum": 100},
+                                          {"type": "integer", "maximum": 50})
+        reasons = list(result.reasons)
+        is_subschema_with_reason({"type": "array", "items": {"type": "string"}},
+                                 {"type": "array", "items": {"type": "integer"}})
+
+        self.assertGreater(len(reasons), 0)
+        self.assertEqual(result.reasons, reasons)
+
 
 class TestSubschemaResultDataclass(unittest.TestCase):
     def test_result_fields(self):
@@ -96,6 +133,22 @@ class TestSubschemaResultDataclass(unittest.TestCase):
         result = SubschemaResult(is_subtype=True)
         self.assertEqual(result.reasons, [])
 
+    def test_ok_is_shared_success_result(self):
+        result = SubschemaResult.ok()
+        self.assertTrue(result.is_subtype)
+        self.assertEqual(result.reasons, [])
+        self.assertIs(result, SubschemaResult.ok())
+        self.assertIs(is_subschema_with_reason({}, {}), result)
+
+    def test_result_is_frozen(self):
+        result = SubschemaResult(is_subtype=False, reasons=["reason1"])
+        with self.assertRaises(FrozenInstanceError):
+            result.is_subtype = True
+        with self.assertRaises(FrozenInstanceError):
+            del result.reasons
+        self.assertEqual(hash(result),
+                         hash(SubschemaResult(is_subtype=False, reasons=["reason1"])))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -12,7 +12,7 @@ Created to ensure the library handles real-world schema relationships correctly.
 
 import unittest
 
-from jsonsubschema import isSubschema
+from jsonsubschema import canonicalize, isSubschemaCanonical
 
 
 class TestSchemaEvolution(unittest.TestCase):
@@ -33,10 +33,12 @@ class TestSchemaEvolution(unittest.TestCase):
             },
             "required": ["name"],
         }
+        c_old_version = canonicalize(old_version)
+        c_new_version = canonicalize(new_version)
         with self.subTest():
-            self.assertFalse(isSubschema(old_version, new_version))
+            self.assertFalse(isSubschemaCanonical(c_old_version, c_new_version))
         with self.subTest():
-            self.assertTrue(isSubschema(new_version, old_version))
+            self.assertTrue(isSubschemaCanonical(c_new_version, c_old_version))
 
     def test_api_breaking_change_required_field(self):
         """Test adding required field breaks backward compatibility."""
@@ -53,10 +55,12 @@ class TestSchemaEvolution(unittest.TestCase):
             },
             "required": ["name", "email"],
         }
+        c_old_version = canonicalize(old_version)
+        c_new_version = canonicalize(new_version)
         with self.subTest():
-            self.assertFalse(isSubschema(old_version, new_version))
+            self.assertFalse(isSubschemaCanonical(c_old_version, c_new_version))
         with self.subTest():
-            self.assertTrue(isSubschema(new_version, old_version))
+            self.assertTrue(isSubschemaCanonical(c_new_version, c_old_version))
 
     def test_api_relaxing_constraint(self):
         """Test relaxing constraint is backward compatible."""
@@ -68,10 +72,12 @@ class TestSchemaEvolution(unittest.TestCase):
             "type": "object",
             "properties": {"age": {"type": "integer", "minimum": 0}},
         }
+        c_strict_schema = canonicalize(strict_schema)
+        c_relaxed_schema = canonicalize(relaxed_schema)
         with self.subTest():
-            self.assertTrue(isSubschema(strict_schema, relaxed_schema))
+            self.assertTrue(isSubschemaCanonical(c_strict_schema, c_relaxed_schema))
         with self.subTest():
-            self.assertFalse(isSubschema(relaxed_schema, strict_schema))
+            self.assertFalse(isSubschemaCanonical(c_relaxed_schema, c_strict_schema))
 
     def test_api_narrowing_type_union(self):
         """Test narrowing type union breaks backward compatibility."""
@@ -83,10 +89,12 @@ class TestSchemaEvolution(unittest.TestCase):
             "type": "object",
             "properties": {"value": {"type": ["string", "integer"]}},
         }
+        c_narrow_union = canonicalize(narrow_union)
+        c_wide_union = canonicalize(wide_union)
         with self.subTest():
-            self.assertTrue(isSubschema(narrow_union, wide_union))
+            self.assertTrue(isSubschemaCanonical(c_narrow_union, c_wide_union))
         with self.subTest():
-            self.assertFalse(isSubschema(wide_union, narrow_union))
+            self.assertFalse(isSubschemaCanonical(c_wide_union, c_narrow_union))
 
 
 class TestNestedStructures(unittest.TestCase):
@@ -133,10 +141,12 @@ class TestNestedStructures(unittest.TestCase):
                 }
             },
         }
+        c_s1 = canonicalize(s1)
+        c_s2 = canonicalize(s2)
         with self.subTest():
-            self.assertTrue(isSubschema(s1, s2))
+            self.assertTrue(isSubschemaCanonical(c_s1, c_s2))
         with self.subTest():
-            self.assertFalse(isSubschema(s2, s1))
+            self.assertFalse(isSubschemaCanonical(c_s2, c_s1))
 
     def test_array_of_complex_objects(self):
         """Test array containing complex object schemas."""
@@ -163,10 +173,12 @@ class TestNestedStructures(unittest.TestCase):
                 },
             },
         }
+        c_s1 = canonicalize(s1)
+        c_s2 = canonicalize(s2)
         with self.subTest():
-            self.assertTrue(isSubschema(s1, s2))
+            self.assertTrue(isSubschemaCanonical(c_s1, c_s2))
         with self.subTest():
-            self.assertFalse(isSubschema(s2, s1))
+            self.assertFalse(isSubschemaCanonical(c_s2, c_s1))
 
     def test_mixed_allOf_anyOf_combination(self):
         """Test complex combination of allOf and anyOf."""
@@ -177,10 +189,12 @@ class TestNestedStructures(unittest.TestCase):
             ]
         }
         s2 = {"type": "integer", "minimum": 10, "maximum": 50}
+        c_s1 = canonicalize(s1)
+        c_s2 = canonicalize(s2)
         with self.subTest():
-            self.assertTrue(isSubschema(s1, s2))
+            self.assertTrue(isSubschemaCanonical(c_s1, c_s2))
         with self.subTest():
-            self.assertFalse(isSubschema(s2, s1))
+            self.assertFalse(isSubschemaCanonical(c_s2, c_s1))
 
 
 class TestMultiConstraintInteraction(unittest.TestCase):
@@ -194,10 +208,12 @@ class TestMultiConstraintInteraction(unittest.TestCase):
             "maxLength": 10,
         }
         s2 = {"type": "string", "minLength": 3, "maxLength": 15}
+        c_s1 = canonicalize(s1)
+        c_s2 = canonicalize(s2)
         with self.subTest():
-            self.assertTrue(isSubschema(s1, s2))
+            self.assertTrue(isSubschemaCanonical(c_s1, c_s2))
         with self.subTest():
-            self.assertFalse(isSubschema(s2, s1))
+            self.assertFalse(isSubschemaCanonical(c_s2, c_s1))
 
     def test_number_multiple_of_with_range(self):
         """Test number with multipleOf and range constraints."""
@@ -208,10 +224,12 @@ class TestMultiConstraintInteraction(unittest.TestCase):
             "multipleOf": 5,
         }
         s2 = {"type": "integer", "minimum": 0, "maximum": 200}
+        c_s1 = canonicalize(s1)
+        c_s2 = canonicalize(s2)
         with self.subTest():
-            self.assertTrue(isSubschema(s1, s2))
+            self.assertTrue(isSubschemaCanonical(c_s1, c_s2))
         with self.subTest():
-            self.assertFalse(isSubschema(s2, s1))
+            self.assertFalse(isSubschemaCanonical(c_s2, c_s1))
 
     def test_array_all_constraints(self):
         """Test array with multiple constraints combined."""
@@ -228,10 +246,12 @@ class TestMultiConstraintInteraction(unittest.TestCase):
             "minItems": 1,
             "maxItems": 10,
         }
+        c_s1 = canonicalize(s1)
+        c_s2 = canonicalize(s2)
         with self.subTest():
-            self.assertTrue(isSubschema(s1, s2))
+            self.assertTrue(isSubschemaCanonical(c_s1, c_s2))
         with self.subTest():
-            self.assertFalse(isSubschema(s2, s1))
+            self.assertFalse(isSubschemaCanonical(c_s2, c_s1))
 
     def test_object_all_constraints(self):
         """Test object with multiple constraints combined."""
@@ -254,10 +274,12 @@ class TestMultiConstraintInteraction(unittest.TestCase):
             },
             "required": ["a"],
         }
+        c_s1 = canonicalize(s1)
+        c_s2 = canonicalize(s2)
         with self.subTest():
-            self.assertTrue(isSubschema(s1, s2))
+            self.assertTrue(isSubschemaCanonical(c_s1, c_s2))
         with self.subTest():
-            self.assertFalse(isSubschema(s2, s1))
+            self.assertFalse(isSubschemaCanonical(c_s2, c_s1))
 
 
 class TestRealWorldPatterns(unittest.TestCase):
@@ -289,10 +311,12 @@ class TestRealWorldPatterns(unittest.TestCase):
             },
             "required": ["jsonrpc", "method", "id"],
         }
+        c_basic_request = canonicalize(basic_request)
+        c_extended_request = canonicalize(extended_request)
         with self.subTest():
-            self.assertFalse(isSubschema(basic_request, extended_request))
+            self.assertFalse(isSubschemaCanonical(c_basic_request, c_extended_request))
         with self.subTest():
-            self.assertTrue(isSubschema(extended_request, basic_request))
+            self.assertTrue(isSubschemaCanonical(c_extended_request, c_basic_request))
 
     def test_geojson_point(self):
         """Test GeoJSON Point schema."""
@@ -317,10 +341,12 @@ class TestRealWorldPatterns(unittest.TestCase):
             },
             "required": ["type", "coordinates"],
         }
+        c_strict_point = canonicalize(strict_point)
+        c_relaxed_point = canonicalize(relaxed_point)
         with self.subTest():
-            self.assertTrue(isSubschema(strict_point, relaxed_point))
+            self.assertTrue(isSubschemaCanonical(c_strict_point, c_relaxed_point))
         with self.subTest():
-            self.assertFalse(isSubschema(relaxed_point, strict_point))
+            self.assertFalse(isSubschemaCanonical(c_relaxed_point, c_strict_point))
 
     def test_package_json_dependencies(self):
         """Test package.json dependencies schema."""
@@ -345,10 +371,12 @@ class TestRealWorldPatterns(unittest.TestCase):
             },
             "required": ["name", "version"],
         }
+        c_s1 = canonicalize(s1)
+        c_s2 = canonicalize(s2)
         with self.subTest():
-            self.assertTrue(isSubschema(s1, s2))
+            self.assertTrue(isSubschemaCanonical(c_s1, c_s2))
         with self.subTest():
-            self.assertFalse(isSubschema(s2, s1))
+            self.assertFalse(isSubschemaCanonical(c_s2, c_s1))
 
 
 if __name__ == "__main__":
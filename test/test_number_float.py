@@ -103,6 +103,17 @@ class TestFloatMultipleOf(unittest.TestCase):
         with self.subTest():
             self.assertFalse(isSubschema(s2, s1))
 
+    def test_float_multipleOf_inexact_remainder(self):
+        """Test multipleOf pairs whose float remainder is not exactly zero."""
+        s1 = {"type": "number", "multipleOf": 0.3}
+        s2 = {"type": "number", "multipleOf": 0.1}
+        with self.subTest():
+            self.assertTrue(isSubschema(s1, s2))
+        with self.subTest():
+            self.assertFalse(isSubschema(s2, s1))
+        with self.subTest():
+            self.assertTrue(isSubschema({"type": "number", "multipleOf": 0.7}, s2))
+
     def test_negative_multipleOf_invalid(self):
         """Test that negative multipleOf is invalid."""
         s1 = {"type": "number", "multipleOf": 0.5}
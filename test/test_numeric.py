@@ -8,7 +8,7 @@ import unittest
 from jsonschema.exceptions import SchemaError
 
 from jsonsubschema import isSubschema
-from jsonsubschema._utils import float_gcd
+from jsonsubschema._utils import float_gcd, get_new_min_max_with_mulof, is_plain_numeric_schema
 
 
 class TestIntegerSubtype(unittest.TestCase):
@@ -647,7 +647,8 @@ class TestCompositeNumericSubtype(unittest.TestCase):
         with self.subTest():
             self.assertFalse(isSubschema(s1, s2))
         with self.subTest():
-            self.assertFalse(isSubschema(s2, s1))
+            # Every multiple of 3 is a multiple of .3
+            self.assertTrue(isSubschema(s2, s1))
 
     def test_enum1(self):
         s1 = {"enum": [1, 2, 3]}
@@ -730,3 +731,21 @@ class TestMultipleOfNegation(unittest.TestCase):
 class TestNumericUtils(unittest.TestCase):
     def test_float_gcd(self):
         assert float_gcd(0.6, 0.4) == 0.2
+
+    def test_get_new_min_max_with_mulof(self):
+        assert get_new_min_max_with_mulof(-7, 7, 3) == (-6, 6)
+        assert get_new_min_max_with_mulof(6, 9, 3) == (6, 9)
+        assert get_new_min_max_with_mulof(1, 10**15, 10**9 + 7) == \
+            (10**9 + 7, (10**15 // (10**9 + 7)) * (10**9 + 7))
+
+    def test_is_plain_numeric_schema(self):
+        assert is_plain_numeric_schema(
+            {"type": "integer", "minimum": 1, "exclusiveMinimum": True})
+        assert is_plain_numeric_schema({"type": "number", "multipleOf": 0.5})
+        assert not is_plain_numeric_schema({"type": "number", "exclusiveMaximum": True})
+        assert not is_plain_numeric_schema({"type": "integer", "multipleOf": 0})
+        assert not is_plain_numeric_schema({"type": "integer", "enum": [1]})
+
+    def test_invalid_numeric_schema(self):
+        with self.assertRaises(SchemaError):
+            isSubschema({"type": "integer", "multipleOf": -2}, {"type": "integer"})
@@ -13,6 +13,7 @@ Created to improve test coverage of patternProperties handling in object types.
 import unittest
 
 from jsonsubschema import isSubschema
+from jsonsubschema._utils import regex_literal_prefix, regex_unanchor
 
 
 class TestPatternPropertiesBasic(unittest.TestCase):
@@ -297,6 +298,54 @@ class TestMultiplePatternProperties(unittest.TestCase):
             self.assertTrue(isSubschema(s2, s1))
 
 
+class TestOverlappingLhsPatterns(unittest.TestCase):
+    """Test rhs keys and patterns matched by several lhs patterns."""
+
+    lhs = {
+        "type": "object",
+        "patternProperties": {"^a": {"type": "string"}, "b$": {"type": "string"}},
+        "additionalProperties": False,
+    }
+
+    def test_property_matched_by_two_patterns(self):
+        """Test an rhs property whose key matches two lhs patterns."""
+        with self.subTest():
+            self.assertTrue(isSubschema(
+                self.lhs, {"type": "object", "properties": {"ab": {"type": "string"}}}))
+        with self.subTest():
+            self.assertFalse(isSubschema(
+                self.lhs, {"type": "object", "properties": {"ab": {"type": "integer"}}}))
+
+    def test_pattern_within_two_patterns(self):
+        """Test an rhs pattern included in two lhs patterns."""
+        s2 = {"type": "object", "patternProperties": {"^ab$": {"type": "string"}}}
+        self.assertTrue(isSubschema(self.lhs, s2))
+
+
+class TestPatternLiteralPrefix(unittest.TestCase):
+    """Test property names checked against the literal prefix of patterns."""
+
+    def test_literal_prefix(self):
+        with self.subTest():
+            self.assertEqual(regex_literal_prefix(regex_unanchor("^x-[a-z]+$")), "x-")
+        with self.subTest():
+            self.assertEqual(regex_literal_prefix(regex_unanchor("^(ab|ac)")), "a")
+        with self.subTest():
+            self.assertEqual(regex_literal_prefix(regex_unanchor("id$")), "")
+
+    def test_names_sharing_part_of_prefix(self):
+        s2 = {"type": "object", "patternProperties": {"^x-": {"type": "string"}}}
+        with self.subTest():
+            self.assertTrue(isSubschema(
+                {"type": "object", "properties": {"x-id": {"type": "string"},
+                                                  "xid": {"type": "integer"}},
+                 "additionalProperties": {"type": "string"}}, s2))
+        with self.subTest():
+            self.assertFalse(isSubschema(
+                {"type": "object", "properties": {"x-id": {"type": "integer"}},
+                 "additionalProperties": {"type": "string"}}, s2))
+
+
 class TestPatternPropertiesEdgeCases(unittest.TestCase):
     """Test edge cases in patternProperties handling."""
 